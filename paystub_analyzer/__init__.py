@@ -1,3 +1,5 @@
+from importlib.metadata import PackageNotFoundError, version
+
 from paystub_analyzer.core import (
     AmountPair,
     PaystubSnapshot,
@@ -47,3 +49,8 @@ __all__ = [
     "extract_w2_from_lines",
     "w2_pdf_to_json_payload",
 ]
+
+try:
+    __version__ = version("project-paystub-analyzer")
+except PackageNotFoundError:  # running from a source checkout
+    __version__ = "0+unknown"
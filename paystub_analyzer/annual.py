@@ -2,11 +2,12 @@
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, replace
 from datetime import date
 from decimal import Decimal
 from pathlib import Path
-from typing import Any, Callable, cast
+from typing import Any, Callable, Iterator, cast
 
 from paystub_analyzer.core import (
     AmountPair,
@@ -20,6 +21,7 @@ from paystub_analyzer.core import (
     sum_state_this_period,
     sum_state_ytd,
 )
+from paystub_analyzer.utils.jsonio import dumps_state_map
 from paystub_analyzer.w2 import compare_snapshot_to_w2
 
 STATE_YTD_OUTLIER_MIN_ABS = Decimal("250.00")
@@ -59,9 +61,20 @@ def collect_annual_snapshots(
     year: int,
     render_scale: float = 2.5,
     psm: int = 6,
+    max_workers: int = 1,
 ) -> list[PaystubSnapshot]:
+    if max_workers < 1:
+        raise ValueError(f"max_workers must be at least 1, got {max_workers}")
     files = list_paystub_files(paystubs_dir, year=year)
-    snapshots = [extract_paystub_snapshot(path, render_scale=render_scale, psm=psm) for path in files]
+    workers = min(len(files), max_workers)
+    if workers <= 1:
+        snapshots = [extract_paystub_snapshot(path, render_scale=render_scale, psm=psm) for path in files]
+    else:
+        # OCR time is spent in the tesseract subprocess, so threads overlap it without pickling snapshots.
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            snapshots = list(
+                executor.map(lambda path: extract_paystub_snapshot(path, render_scale=render_scale, psm=psm), files)
+            )
     snapshots.sort(key=snapshot_sort_key)
     return snapshots
 
@@ -1592,21 +1605,51 @@ def build_tax_filing_package(
 STATE_TAX_MATCH_TOLERANCE_CENTS = 100
 
 
-def package_to_markdown(package: dict[str, Any]) -> str:
-    household = package["household_summary"]
+LEDGER_CSV_FIELDNAMES = (
+    "pay_date",
+    "file",
+    "gross_pay_this_period",
+    "gross_pay_ytd",
+    "federal_tax_this_period",
+    "federal_tax_ytd",
+    "social_security_tax_this_period",
+    "social_security_tax_ytd",
+    "medicare_tax_this_period",
+    "medicare_tax_ytd",
+    "state_tax_this_period_total",
+    "state_tax_ytd_total",
+    "state_tax_this_period_by_state",
+    "state_tax_ytd_by_state",
+    "ytd_verification",
+)
+# Ledger CSV columns serialized before writing; every other column is written verbatim.
+LEDGER_CSV_TRANSFORMS: dict[str, Callable[[Any], Any]] = {
+    "state_tax_this_period_by_state": dumps_state_map,
+    "state_tax_ytd_by_state": dumps_state_map,
+}
+
 
-    lines: list[str] = []
+def ledger_csv_rows(ledger: list[dict[str, Any]]) -> Iterator[tuple[Any, ...]]:
+    """Yield each ledger row as CSV values in LEDGER_CSV_FIELDNAMES order."""
+    columns = [(field, LEDGER_CSV_TRANSFORMS.get(field)) for field in LEDGER_CSV_FIELDNAMES]
+    for row in ledger:
+        yield tuple(row.get(field, "") if transform is None else transform(row[field]) for field, transform in columns)
 
-    lines.append("# Tax Filing Packet (v0.3.0)")
-    lines.append("")
-    lines.append(f"- Schema Version: {package['schema_version']}")
-    lines.append(f"- Ready to file: `{household['ready_to_file']}`")
-    lines.append("")
 
-    lines.append("## Household Summary")
-    lines.append(f"- Total Gross Pay: ${household['total_gross_pay_cents'] / 100:,.2f}")
-    lines.append(f"- Total Fed Tax: ${household['total_fed_tax_cents'] / 100:,.2f}")
-    lines.append("")
+def package_to_markdown(package: dict[str, Any]) -> str:
+    household = package["household_summary"]
+
+    lines: list[str] = [
+        "# Tax Filing Packet (v0.3.0)",
+        "",
+        f"- Schema Version: {package['schema_version']}",
+        f"- Ready to file: `{household['ready_to_file']}`",
+        "",
+        "## Household Summary",
+        f"- Total Gross Pay: ${household['total_gross_pay_cents'] / 100:,.2f}",
+        f"- Total Fed Tax: ${household['total_fed_tax_cents'] / 100:,.2f}",
+        "",
+    ]
 
     for filer in package["filers"]:
         # Capitalize role or name
@@ -1614,10 +1657,14 @@ def package_to_markdown(package: dict[str, Any]) -> str:
         if filer.get("role"):
             header_title += f" ({filer['role']})"
 
-        lines.append(f"## {header_title}")
-        lines.append(f"- Gross Pay: ${filer['gross_pay_cents'] / 100:,.2f}")
-        lines.append(f"- Fed Tax: ${filer['fed_tax_cents'] / 100:,.2f}")
-        lines.append(f"- Status: {filer['status']}")
+        lines.extend(
+            (
+                f"## {header_title}",
+                f"- Gross Pay: ${filer['gross_pay_cents'] / 100:,.2f}",
+                f"- Fed Tax: ${filer['fed_tax_cents'] / 100:,.2f}",
+                f"- Status: {filer['status']}",
+            )
+        )
 
         # W-2 Summary if present
         if filer.get("w2_source_count", 0) > 0:
@@ -1629,14 +1676,17 @@ def package_to_markdown(package: dict[str, Any]) -> str:
 
         if filer.get("audit_flags"):
             lines.append("### Audit Flags")
-            for flag in filer["audit_flags"]:
-                lines.append(f"- {flag}")
+            lines.extend(f"- {flag}" for flag in filer["audit_flags"])
 
         correction_trace = filer.get("correction_trace", [])
         if correction_trace:
-            lines.append("### Corrections & Overrides")
-            lines.append("| Field | Original | Corrected | Reason |")
-            lines.append("| :--- | :--- | :--- | :--- |")
+            lines.extend(
+                (
+                    "### Corrections & Overrides",
+                    "| Field | Original | Corrected | Reason |",
+                    "| :--- | :--- | :--- | :--- |",
+                )
+            )
             for c in correction_trace:
                 field = c.get("corrected_field", "")
                 orig = c.get("original_value")
@@ -1665,10 +1715,14 @@ def package_to_markdown(package: dict[str, Any]) -> str:
         all_states = sorted(set(paystub_states.keys()) | set(w2_state_map.keys()))
 
         if all_states:
-            lines.append("")
-            lines.append("### State Tax Verification")
-            lines.append("| State | Paystub YTD | W-2 Box 17 | Difference | Status |")
-            lines.append("| :--- | :--- | :--- | :--- | :--- |")
+            lines.extend(
+                (
+                    "",
+                    "### State Tax Verification",
+                    "| State | Paystub YTD | W-2 Box 17 | Difference | Status |",
+                    "| :--- | :--- | :--- | :--- | :--- |",
+                )
+            )
 
             for st in all_states:
                 ps_cents = paystub_states.get(st, 0)
@@ -16,7 +16,9 @@ from pathlib import Path
 from typing import Any
 
 from paystub_analyzer.annual import (
+    LEDGER_CSV_FIELDNAMES,
     collect_annual_snapshots,
+    ledger_csv_rows,
     package_to_markdown,
 )
 from paystub_analyzer.core import format_money
@@ -45,32 +47,16 @@ def write_ledger_csv(path: Path, ledger: list[dict[str, Any]]) -> None:
         return
 
     with path.open("w", newline="", encoding="utf-8") as handle:
-        fieldnames = [
-            "pay_date",
-            "file",
-            "gross_pay_this_period",
-            "gross_pay_ytd",
-            "federal_tax_this_period",
-            "federal_tax_ytd",
-            "social_security_tax_this_period",
-            "social_security_tax_ytd",
-            "medicare_tax_this_period",
-            "medicare_tax_ytd",
-            "state_tax_this_period_total",
-            "state_tax_ytd_total",
-            "state_tax_this_period_by_state",
-            "state_tax_ytd_by_state",
-            "ytd_verification",
-        ]
-        writer = csv.DictWriter(handle, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in ledger:
-            to_write = dict(row)
-            to_write["state_tax_this_period_by_state"] = json.dumps(
-                row["state_tax_this_period_by_state"], sort_keys=True
-            )
-            to_write["state_tax_ytd_by_state"] = json.dumps(row["state_tax_ytd_by_state"], sort_keys=True)
-            writer.writerow(to_write)
+        writer = csv.writer(handle)
+        writer.writerow(LEDGER_CSV_FIELDNAMES)
+        writer.writerows(ledger_csv_rows(ledger))
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
 
 def main() -> None:
@@ -83,6 +69,9 @@ def main() -> None:
     parser.add_argument("--w2-pdf", type=Path, default=None, help="Optional W-2 PDF for cross-verification.")
     parser.add_argument("--render-scale", type=float, default=2.8, help="OCR render scale.")
     parser.add_argument("--w2-render-scale", type=float, default=3.0, help="W-2 OCR render scale.")
+    parser.add_argument(
+        "--max-workers", type=positive_int, default=1, help="Paystubs to OCR in parallel (default: 1, serial)."
+    )
     parser.add_argument("--tolerance", type=Decimal, default=Decimal("0.01"), help="Comparison tolerance.")
     parser.add_argument("--ledger-csv-out", type=Path, default=None, help="CSV output path.")
     parser.add_argument("--package-json-out", type=Path, default=None, help="JSON output path.")
@@ -197,6 +186,7 @@ def main() -> None:
             year=args.year,
             render_scale=args.render_scale,
             psm=6,
+            max_workers=args.max_workers,
         )
 
     def w2_loader(source_cfg: dict[str, Any]) -> dict[str, Any] | None:
@@ -6,6 +6,7 @@ import re
 import shutil
 import subprocess
 import tempfile
+import threading
 from dataclasses import dataclass, field
 from datetime import date, datetime
 from decimal import Decimal
@@ -22,6 +23,9 @@ FILENAME_PAY_DATE_RE = re.compile(r"Pay Date (\d{4}-\d{2}-\d{2})(?:_.*)?\.pdf$",
 TEXT_PAY_DATE_RE = re.compile(r"Pay Date:\s*(\d{2}/\d{2}/\d{4})", re.IGNORECASE)
 STATE_TAX_LINE_RE = re.compile(r"\b([A-Z]{2}) State Income Tax\b", re.IGNORECASE)
 MAX_PLAUSIBLE_AMOUNT = Decimal("10000000.00")
+# Bump whenever extract_paystub_snapshot's parsing changes (regexes, YTD inference, state parsing, anomaly
+# rules); cached snapshots produced by an older extractor are then ignored.
+SNAPSHOT_EXTRACTOR_VERSION = 1
 OcrTextProvider = Callable[[Path, float, int], str]
 
 
@@ -206,13 +210,21 @@ def run_tesseract(image_path: Path, psm: int = 6) -> str:
     return process.stdout
 
 
+# PDFium is not thread-safe, so rendering is serialized; the tesseract subprocess runs outside the lock.
+PDFIUM_LOCK = threading.Lock()
+
+
 def ocr_first_page(pdf_path: Path, render_scale: float = 2.5, psm: int = 6) -> str:
-    document = pdfium.PdfDocument(str(pdf_path))
-    page = document[0]
     with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as temp_file:
         image_path = Path(temp_file.name)
     try:
-        page.render(scale=render_scale).to_pil().save(image_path)
+        with PDFIUM_LOCK:
+            document = pdfium.PdfDocument(str(pdf_path))
+            try:
+                image = document[0].render(scale=render_scale).to_pil()
+            finally:
+                document.close()
+        image.save(image_path)
         return run_tesseract(image_path, psm=psm)
     finally:
         image_path.unlink(missing_ok=True)
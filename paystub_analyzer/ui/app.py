@@ -3,22 +3,39 @@
 from __future__ import annotations
 
 import csv
+import functools
+import gc
 import hashlib
 import inspect
 import io
 import json
+import os
+import re
+import sys
 import tempfile
 import time
+from collections import Counter
+from dataclasses import asdict, fields
 from datetime import date, datetime
 from decimal import Decimal
 from pathlib import Path
-from typing import Any, Literal, cast
+from typing import TYPE_CHECKING, Any, Iterator, Literal, cast
 
-import pandas as pd
 import streamlit as st
 
+from paystub_analyzer.utils.imports import lazy_import
+from paystub_analyzer.utils.jsonio import dumps_json_canonical, dumps_json_pretty, loads_json_bytes
 
+# pandas (and NumPy behind it) is the slowest import in the app; defer it until a frame is first built.
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+
+from paystub_analyzer import __version__ as PACKAGE_VERSION
 from paystub_analyzer.core import (
+    SNAPSHOT_EXTRACTOR_VERSION,
     AmountPair,
     as_float,
     extract_paystub_snapshot,
@@ -29,897 +46,213 @@ from paystub_analyzer.core import (
     PaystubSnapshot,
 )
 from paystub_analyzer import annual as annual_module
+from paystub_analyzer.utils.contracts import validate_output
+from paystub_analyzer.utils.migration import migrate_household_config
 from paystub_analyzer.w2 import build_w2_template, compare_snapshot_to_w2
-from paystub_analyzer.w2_pdf import w2_pdf_to_json_payload
-from paystub_analyzer.annual import build_household_package
-
-
-def _hash_file(path: Path) -> str:
-    import hashlib
+from paystub_analyzer.w2_aggregator import load_and_aggregate_w2s
+from paystub_analyzer.w2_pdf import US_STATE_CODES, w2_pdf_to_json_payload
+from paystub_analyzer.annual import LEDGER_CSV_FIELDNAMES, build_household_package, ledger_csv_rows
 
-    with open(path, "rb") as f:
-        return hashlib.sha256(f.read()).hexdigest()
-
-
-@st.cache_data(show_spinner=False)
-def get_cached_paystub_snapshot(path_str: str, file_hash: str, render_scale: float) -> PaystubSnapshot:
-    return extract_paystub_snapshot(Path(path_str), render_scale=render_scale)
 
-
-@st.cache_data(show_spinner=False)
-def get_cached_w2_payload(
-    pdf_path_str: str, file_hash: str, render_scale: float, psm: int, fallback_year: int
-) -> dict[str, Any]:
-    return w2_pdf_to_json_payload(Path(pdf_path_str), render_scale=render_scale, psm=psm, fallback_year=fallback_year)
-
-
-@st.cache_data(show_spinner=False)
-def get_cached_config_w2_payload(
-    file_paths: tuple[str, ...],
-    base_dir_str: str,
-    tax_year: int,
-    render_scale: float,
-) -> dict[str, Any] | None:
-    from paystub_analyzer.w2_aggregator import load_and_aggregate_w2s
-
-    return load_and_aggregate_w2s(list(file_paths), Path(base_dir_str), tax_year, pdf_render_scale=render_scale)
-
-
-build_tax_filing_package = annual_module.build_tax_filing_package
-collect_annual_snapshots = annual_module.collect_annual_snapshots
-package_to_markdown = annual_module.package_to_markdown
-
-APP_SESSION_SCHEMA_VERSION = "2026-02-25-household-w2-defaults-v1"
-ButtonKind = Literal["primary", "secondary", "tertiary"]
-
-DEFAULT_PRIMARY_PAYSTUB_DIR = "pay_statements"
-DEFAULT_SPOUSE_PAYSTUB_DIR = "pay_statements/spouse"
+HASH_CHUNK_SIZE = 1 << 20
+GC_GEN0_THRESHOLD = 50_000
+# Snapshots hold full OCR text (PII), so the on-disk cache is opt-in: set this variable to 1 to enable it.
+SNAPSHOT_DISK_CACHE_ENV = "PAYSTUB_ANALYZER_SNAPSHOT_CACHE"
+SNAPSHOT_DISK_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "paystub_analyzer" / "snapshots"
+)
+# The snapshot dataclass layout is one part of the disk cache key; the package version, the core
+# extractor version and the OCR page-segmentation mode make up the rest (see snapshot_cache_namespace).
+SNAPSHOT_LAYOUT = repr(
+    [(cls.__name__, f.name, str(f.type)) for cls in (PaystubSnapshot, AmountPair) for f in fields(cls)]
+)
+SNAPSHOT_OCR_PSM: int = inspect.signature(extract_paystub_snapshot).parameters["psm"].default
 
 
-def apply_theme() -> None:
-    st.markdown(
-        """
-<style>
-/* Import modern fonts */
-@import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&family=JetBrains+Mono:wght@400;500&display=swap');
-
-:root {
-  /* Core Palette - High Contrast Light Theme */
-  --bg-core: #ffffff;
-  --bg-surface: #f8f9fa;
-  --bg-subtle: #e9ecef;
-
-  --text-primary: #1a1a1a;
-  --text-secondary: #4a4a4a;
-  --text-tertiary: #6c757d;
-
-  --brand-primary: #0f5d75;
-  --brand-primary-hover: #0b4a5d;
-  --brand-secondary: #d97324;
-  --button-width: 220px;
-
-  --border-subtle: #dee2e6;
-  --border-strong: #ced4da;
-}
+def _hash_file(path: Path) -> str:
+    """SHA-256 a file in fixed-size chunks so large PDFs are never held in memory whole."""
+    with open(path, "rb") as f:
+        if sys.version_info >= (3, 11):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        digest = hashlib.sha256()
+        buffer = bytearray(HASH_CHUNK_SIZE)
+        view = memoryview(buffer)
+        while size := f.readinto(buffer):
+            digest.update(view[:size])
+        return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=256)
+def _hash_file_version(path_str: str, mtime_ns: int, size: int) -> str:
+    return _hash_file(Path(path_str))
+
+
+def cached_file_hash(path: Path) -> str:
+    """SHA-256 a file at most once per (path, mtime, size) version; unchanged files skip the re-read."""
+    stat = path.stat()
+    return _hash_file_version(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def uploaded_file_digest(uploaded: Any, algorithm: str, digest_size: int | None = None) -> str:
+    """Hash an upload's bytes once per Streamlit file_id, algorithm and digest size."""
+    digests: dict[tuple[str, str, int | None], str] = st.session_state.setdefault("_upload_digests", {})
+    cache_key = (str(uploaded.file_id), algorithm, digest_size)
+    digest = digests.get(cache_key)
+    if digest is None:
+        with uploaded.getbuffer() as view:
+            if algorithm == "blake2b" and digest_size is not None:
+                digest = hashlib.blake2b(view, digest_size=digest_size).hexdigest()
+            else:
+                digest = hashlib.new(algorithm, view).hexdigest()
+        digests[cache_key] = digest
+    return digest
 
-/* Reduce default spacing */
-.block-container {
-    padding-top: 2rem;
-    padding-bottom: 3rem;
-    padding-left: 2rem;
-    padding-right: 2rem;
-}
-div[data-testid="stVerticalBlock"] > div {
-    gap: 0.75rem !important; /* Reduce gap between elements */
-}
 
-/* Global resets for Streamlit containers */
-[data-testid="stAppViewContainer"] {
-  background-color: var(--bg-core);
-  color: var(--text-primary);
-  font-family: 'Inter', sans-serif;
-}
+def write_temp_pdf(content: bytes | memoryview) -> Path:
+    """Write content to a new temporary .pdf file with unbuffered os.write calls."""
+    fd, temp_name = tempfile.mkstemp(suffix=".pdf")
+    try:
+        view = memoryview(content)
+        while view:
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
+    return Path(temp_name)
 
-[data-testid="stHeader"] {
-  background-color: rgba(255, 255, 255, 0.95);
-  border-bottom: 1px solid var(--border-subtle);
-  position: sticky;
-  top: 0;
-  z-index: 90;
-  backdrop-filter: blur(4px);
-}
 
-/* Real fixed title in top app header row (next to Deploy/menu) */
-.app-topline-title {
-  position: fixed;
-  left: 3rem;
-  top: 0.62rem;
-  z-index: 120;
-  font-size: 1.35rem;
-  font-weight: 700;
-  letter-spacing: -0.02em;
-  color: var(--text-primary);
-  line-height: 1;
-  max-width: calc(100vw - 15rem);
-  white-space: nowrap;
-  overflow: hidden;
-  text-overflow: ellipsis;
-  pointer-events: none;
-}
-[data-testid="stSidebar"][aria-expanded="true"] + div .app-topline-title {
-  left: calc(300px + 1rem) !important;
-  max-width: calc(100vw - 300px - 12rem) !important;
-}
-[data-testid="stSidebar"][aria-expanded="false"] + div .app-topline-title {
-  left: 3rem !important;
-  max-width: calc(100vw - 12rem) !important;
-}
+def snapshot_disk_cache_enabled() -> bool:
+    return os.environ.get(SNAPSHOT_DISK_CACHE_ENV, "").strip().lower() in ("1", "true", "yes")
 
-[data-testid="stSidebar"] {
-  background-color: var(--bg-surface);
-  border-right: 1px solid var(--border-subtle);
-}
 
-/* Sidebar collapse/expand control visibility on light theme */
-[data-testid="stSidebarHeader"] {
-  background-color: var(--bg-surface) !important;
-  border-bottom: 1px solid var(--border-subtle);
-}
-[data-testid="stSidebarHeader"] button,
-[data-testid="stSidebarHeader"] [role="button"],
-[data-testid="stSidebarHeader"] button[kind="header"],
-[data-testid="stSidebarHeader"] button[aria-label*="sidebar" i],
-[data-testid="stSidebarHeader"] button[title*="sidebar" i],
-[data-testid="stSidebarCollapseButton"] button,
-[data-testid="stSidebarCollapseButton"] [role="button"],
-[data-testid="stExpandSidebarButton"],
-[data-testid="stExpandSidebarButton"] button,
-[data-testid="stExpandSidebarButton"] [role="button"],
-[data-testid="collapsedControl"] button,
-[data-testid="collapsedControl"] [role="button"] {
-  color: var(--text-primary) !important;
-  background-color: transparent !important;
-  border: 1px solid transparent !important;
-  opacity: 1 !important;
-  visibility: visible !important;
-}
-[data-testid="stSidebarHeader"] button svg,
-[data-testid="stSidebarHeader"] [role="button"] svg,
-[data-testid="stSidebarHeader"] button[kind="header"] svg,
-[data-testid="stSidebarCollapseButton"] button svg,
-[data-testid="stSidebarCollapseButton"] [role="button"] svg,
-[data-testid="stExpandSidebarButton"] svg,
-[data-testid="stExpandSidebarButton"] button svg,
-[data-testid="stExpandSidebarButton"] [role="button"] svg,
-[data-testid="collapsedControl"] button svg,
-[data-testid="collapsedControl"] [role="button"] svg {
-  fill: currentColor !important;
-  stroke: currentColor !important;
-}
-[data-testid="stSidebarHeader"] button *,
-[data-testid="stSidebarHeader"] [role="button"] *,
-[data-testid="stSidebarHeader"] button[kind="header"] *,
-[data-testid="stSidebarCollapseButton"] button *,
-[data-testid="stSidebarCollapseButton"] [role="button"] *,
-[data-testid="stExpandSidebarButton"] *,
-[data-testid="stExpandSidebarButton"] button *,
-[data-testid="stExpandSidebarButton"] [role="button"] *,
-[data-testid="collapsedControl"] button *,
-[data-testid="collapsedControl"] [role="button"] * {
-  color: var(--text-primary) !important;
-  fill: currentColor !important;
-  stroke: currentColor !important;
-  opacity: 1 !important;
-  visibility: visible !important;
-}
-[data-testid="stSidebarHeader"] button:hover,
-[data-testid="stSidebarHeader"] button:focus-visible,
-[data-testid="stSidebarHeader"] [role="button"]:hover,
-[data-testid="stSidebarHeader"] [role="button"]:focus-visible,
-[data-testid="stSidebarHeader"] button[kind="header"]:hover,
-[data-testid="stSidebarHeader"] button[kind="header"]:focus-visible,
-[data-testid="stSidebarHeader"] button[aria-label*="sidebar" i]:hover,
-[data-testid="stSidebarHeader"] button[aria-label*="sidebar" i]:focus-visible,
-[data-testid="stSidebarHeader"] button[title*="sidebar" i]:hover,
-[data-testid="stSidebarHeader"] button[title*="sidebar" i]:focus-visible,
-[data-testid="stSidebarCollapseButton"] button:hover,
-[data-testid="stSidebarCollapseButton"] button:focus-visible,
-[data-testid="stSidebarCollapseButton"] [role="button"]:hover,
-[data-testid="stSidebarCollapseButton"] [role="button"]:focus-visible,
-[data-testid="stExpandSidebarButton"]:hover,
-[data-testid="stExpandSidebarButton"]:focus-visible,
-[data-testid="stExpandSidebarButton"] button:hover,
-[data-testid="stExpandSidebarButton"] button:focus-visible,
-[data-testid="stExpandSidebarButton"] [role="button"]:hover,
-[data-testid="stExpandSidebarButton"] [role="button"]:focus-visible,
-[data-testid="collapsedControl"] button:hover,
-[data-testid="collapsedControl"] button:focus-visible,
-[data-testid="collapsedControl"] [role="button"]:hover,
-[data-testid="collapsedControl"] [role="button"]:focus-visible {
-  color: var(--text-primary) !important;
-  background-color: var(--bg-subtle) !important;
-  border-color: var(--border-strong) !important;
-}
+@functools.lru_cache(maxsize=8)
+def snapshot_cache_namespace(package_version: str, extractor_version: int, psm: int) -> str:
+    """Fingerprint everything besides the PDF bytes and render scale that determines an extracted snapshot."""
+    key = repr((SNAPSHOT_LAYOUT, package_version, extractor_version, psm))
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
 
-/* Typographic enhancements */
-h1, h2, h3, h4, h5, h6 {
-  color: var(--text-primary);
-  font-weight: 700;
-  letter-spacing: -0.02em;
-  margin-bottom: 0.5rem !important; /* Tighten headers */
-}
 
-/* In-page intro under fixed header title */
-.app-intro {
-  margin: 0.25rem 0 0.6rem;
-}
-.app-intro p {
-  margin: 0 !important;
-  color: var(--text-secondary) !important;
-  font-size: 0.95rem !important;
-}
+def snapshot_disk_cache_path(file_hash: str, render_scale: float) -> Path:
+    namespace = snapshot_cache_namespace(PACKAGE_VERSION, SNAPSHOT_EXTRACTOR_VERSION, SNAPSHOT_OCR_PSM)
+    return SNAPSHOT_DISK_CACHE_DIR / f"{namespace}_{file_hash}_{render_scale}.json"
 
-/* Section heading treatment for Step blocks */
-.step-heading {
-  display: flex;
-  align-items: center; /* Change from flex-start to center */
-  gap: 0.7rem;
-  padding: 0.55rem 0.8rem;
-  margin: 0.2rem 0 0.45rem;
-  border: 1px solid #d5e3ea;
-  border-radius: 10px;
-  background: linear-gradient(180deg, #f8fcff 0%, #f3f8fb 100%);
-}
-.step-chip {
-  display: inline-flex;
-  align-items: center;
-  justify-content: center;
-  min-width: 80px;
-  height: 2.25rem;
-  padding: 0 0.75rem;
-  border-radius: 8px;
-  border: 1px solid #b8d0db;
-  background: #ffffff;
-  color: #0f5d75;
-  font-size: 0.9rem;
-  font-weight: 700;
-  text-transform: uppercase;
-  letter-spacing: 0.05em;
-  box-shadow: 0 1px 2px rgba(0,0,0,0.05);
-}
-.step-copy h3 {
-  margin: 0 !important;
-  color: var(--text-primary);
-  font-size: 1.25rem;
-  letter-spacing: -0.01em;
-}
-.step-copy p {
-  margin: 0.2rem 0 0 !important;
-  color: var(--text-secondary) !important;
-  font-size: 0.9rem !important;
-}
 
-/* Fix global text spilling into Tooltips or unexpected places */
-div[data-testid="stMarkdownContainer"] p,
-div[data-testid="stMarkdownContainer"] li {
-  color: var(--text-primary);
-  font-size: 1rem;
-  line-height: 1.5; /* Slightly tighter line height */
-  margin-bottom: 0.5rem; /* Reduce paragraph spacing */
-}
+def _cached_decimal(value: Any) -> Decimal | None:
+    return None if value is None else Decimal(str(value))
 
-.stCaption {
-  color: var(--text-tertiary) !important;
-  font-size: 0.85rem !important;
-}
 
-/* Custom Card Component */
-.metric-card {
-  background: var(--bg-surface);
-  border: 1px solid var(--border-subtle);
-  border-radius: 6px;
-  padding: 0.75rem 1rem; /* Tighter padding */
-  box-shadow: 0 1px 2px rgba(0,0,0,0.05); /* Softer shadow */
-  margin-bottom: 0px; /* Let flex gap handle spacing */
-}
+def _amount_pair_from_cache(payload: dict[str, Any]) -> AmountPair:
+    return AmountPair(
+        this_period=_cached_decimal(payload["this_period"]),
+        ytd=_cached_decimal(payload["ytd"]),
+        source_line=payload["source_line"],
+        is_ytd_confirmed=bool(payload["is_ytd_confirmed"]),
+    )
 
-.metric-card .label {
-  font-size: 0.7rem;
-  text-transform: uppercase;
-  letter-spacing: 0.05em;
-  color: var(--text-tertiary);
-  font-weight: 600;
-  margin-bottom: 0.2rem;
-}
 
-.metric-card .value {
-  font-size: 1.15rem; /* Slightly smaller value text */
-  font-weight: 700;
-  color: var(--brand-primary);
-  font-family: 'JetBrains Mono', monospace;
-}
+def snapshot_from_cache_payload(payload: dict[str, Any]) -> PaystubSnapshot:
+    return PaystubSnapshot(
+        file=str(payload["file"]),
+        pay_date=payload["pay_date"],
+        gross_pay=_amount_pair_from_cache(payload["gross_pay"]),
+        federal_income_tax=_amount_pair_from_cache(payload["federal_income_tax"]),
+        social_security_tax=_amount_pair_from_cache(payload["social_security_tax"]),
+        medicare_tax=_amount_pair_from_cache(payload["medicare_tax"]),
+        k401_contrib=_amount_pair_from_cache(payload["k401_contrib"]),
+        state_income_tax={
+            str(state): _amount_pair_from_cache(pair) for state, pair in payload["state_income_tax"].items()
+        },
+        normalized_lines=[str(line) for line in payload["normalized_lines"]],
+        parse_anomalies=[dict(anomaly) for anomaly in payload["parse_anomalies"]],
+    )
 
-/* UI Elements Overrides */
-div[data-baseweb="select"] > div,
-div[data-baseweb="input"] > div {
-  background-color: var(--bg-core) !important;
-  border-color: var(--border-strong) !important;
-  color: var(--text-primary) !important;
-  min-height: 38px;
-}
 
-div[data-baseweb="input"] input,
-div[data-baseweb="select"] span,
-div[data-baseweb="base-input"] input {
-  color: var(--text-primary) !important;
-  -webkit-text-fill-color: var(--text-primary) !important;
-  caret-color: var(--brand-primary) !important;
-}
-div[data-baseweb="input"] input:focus-visible,
-div[data-baseweb="base-input"] input:focus-visible,
-div[data-baseweb="select"] input:focus-visible,
-div[data-baseweb="select"] span:focus-visible {
-  outline: 2px solid var(--brand-primary) !important;
-  outline-offset: 1px;
-}
+def load_disk_cached_snapshot(file_hash: str, render_scale: float) -> PaystubSnapshot | None:
+    """Return a snapshot persisted by an earlier process, or None when absent or unreadable."""
+    try:
+        payload = json.loads(snapshot_disk_cache_path(file_hash, render_scale).read_bytes())
+        return snapshot_from_cache_payload(payload)
+    except (OSError, ValueError, TypeError, KeyError, AttributeError, ArithmeticError):
+        return None
 
-/* Ensure labels are readable */
-label[data-baseweb="checkbox"] span,
-label[data-baseweb="radio"] span,
-div[data-testid="stSidebar"] [data-testid="stWidgetLabel"],
-div[data-testid="stSidebar"] [data-testid="stWidgetLabel"] * {
-  color: var(--text-primary) !important;
-  font-size: 0.9rem !important;
-  font-weight: 500 !important;
-}
 
-/* Fix for disabled inputs if needed */
-div[data-baseweb="input"] input:disabled {
-  color: var(--text-tertiary) !important;
-  -webkit-text-fill-color: var(--text-tertiary) !important;
-}
+def store_disk_cached_snapshot(file_hash: str, render_scale: float, snapshot: PaystubSnapshot) -> None:
+    """Persist a snapshot atomically as JSON; the disk cache is best-effort, so write failures are ignored."""
+    target = snapshot_disk_cache_path(file_hash, render_scale)
+    try:
+        target.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                # Decimals are written as strings so amounts round-trip exactly.
+                json.dump(asdict(snapshot), handle, default=str)
+            os.replace(temp_name, target)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+    except OSError:
+        pass
 
-/* Button Styling Fixes */
-div.stButton > button,
-div.stButton button,
-div[data-testid="stFormSubmitButton"] > button,
-div[data-testid="stFormSubmitButton"] button,
-div.stDownloadButton > button,
-div.stDownloadButton button,
-div[data-testid="stDownloadButton"] > button,
-div[data-testid="stDownloadButton"] button,
-div[data-testid="stFileUploader"] button,
-div[data-testid="stFileUploaderDropzone"] button,
-div[data-testid="stFileUploader"] [data-testid="stBaseButton-secondary"] {
-    width: var(--button-width) !important;
-    min-width: var(--button-width);
-    max-width: var(--button-width);
-    min-height: 2.5rem !important;
-    border-radius: 6px;
-    font-weight: 600;
-    transition: all 0.2s ease;
-    display: inline-flex !important;
-    align-items: center !important;
-    justify-content: center !important;
-    line-height: normal !important;
-    padding-top: 0.5rem !important;
-    padding-bottom: 0.5rem !important;
-    white-space: nowrap !important;
-}
 
-/* Reset inner text elements for deterministic alignment */
-div.stButton > button > div,
-div.stButton > button > div *,
-div.stButton button > div,
-div.stButton button > div *,
-div[data-testid="stFormSubmitButton"] > button > div,
-div[data-testid="stFormSubmitButton"] > button > div *,
-div[data-testid="stFormSubmitButton"] button > div,
-div[data-testid="stFormSubmitButton"] button > div *,
-div.stDownloadButton > button > div,
-div.stDownloadButton > button > div *,
-div.stDownloadButton button > div,
-div.stDownloadButton button > div *,
-div[data-testid="stDownloadButton"] > button > div,
-div[data-testid="stDownloadButton"] > button > div *,
-div[data-testid="stDownloadButton"] button > div,
-div[data-testid="stDownloadButton"] button > div *,
-div[data-testid="stFileUploader"] button > div,
-div[data-testid="stFileUploader"] button > div *,
-div[data-testid="stFileUploaderDropzone"] button > div,
-div[data-testid="stFileUploaderDropzone"] button > div *,
-div[data-testid="stFileUploader"] [data-testid="stBaseButton-secondary"] > div,
-div[data-testid="stFileUploader"] [data-testid="stBaseButton-secondary"] > div * {
-    line-height: 1 !important;
-    margin: 0 !important;
-    padding: 0 !important;
-    color: inherit !important;
-}
+@st.cache_data(show_spinner=False)
+def get_cached_paystub_snapshot(path_str: str, file_hash: str, render_scale: float) -> PaystubSnapshot:
+    # Snapshots are a pure function of file content and render scale; when opted in, they survive restarts on disk.
+    use_disk_cache = snapshot_disk_cache_enabled()
+    snapshot = load_disk_cached_snapshot(file_hash, render_scale) if use_disk_cache else None
+    if snapshot is None:
+        snapshot = extract_paystub_snapshot(Path(path_str), render_scale=render_scale)
+        if use_disk_cache:
+            store_disk_cached_snapshot(file_hash, render_scale, snapshot)
+    return snapshot
 
-/* Spinbutton Fixes: Neutral focus ring for A11Y, no stuck colors */
-button[data-baseweb="spinbutton"] {
-    background-color: transparent !important;
-    color: var(--text-primary) !important;
-    border: none !important;
-}
-button[data-baseweb="spinbutton"]:hover {
-    background-color: var(--bg-subtle) !important;
-    color: var(--brand-primary) !important;
-}
-button[data-baseweb="spinbutton"]:focus-visible {
-    outline: 2px solid var(--text-primary) !important;
-    outline-offset: -2px;
-    background-color: var(--bg-subtle) !important;
-    box-shadow: none !important;
-}
-/* Prevent "stuck" active color when parent input has focus, unless hovering */
-div[data-baseweb="input"]:focus-within button[data-baseweb="spinbutton"]:not(:hover):not(:focus-visible) {
-    background-color: transparent !important;
-    color: var(--text-primary) !important;
-    box-shadow: none !important;
-}
 
-/* Unified action button theme (Extract / Compare / Build) */
-div.stButton > button,
-div.stButton button,
-div.stFormSubmitButton > button,
-div.stFormSubmitButton button,
-div[data-testid="stFormSubmitButton"] > button,
-div[data-testid="stFormSubmitButton"] button,
-div.stDownloadButton > button,
-div.stDownloadButton button,
-div[data-testid="stDownloadButton"] > button,
-div[data-testid="stDownloadButton"] button,
-div[data-testid="stFileUploader"] button,
-div[data-testid="stFileUploaderDropzone"] button,
-div[data-testid="stFileUploader"] [data-testid="stBaseButton-secondary"] {
-  background-color: var(--brand-primary) !important;
-  color: #ffffff !important;
-  border: 1px solid var(--brand-primary) !important;
-}
-div.stButton > button:hover,
-div.stButton button:hover,
-div.stFormSubmitButton > button:hover,
-div.stFormSubmitButton button:hover,
-div[data-testid="stFormSubmitButton"] > button:hover,
-div[data-testid="stFormSubmitButton"] button:hover,
-div.stDownloadButton > button:hover,
-div.stDownloadButton button:hover,
-div[data-testid="stDownloadButton"] > button:hover,
-div[data-testid="stDownloadButton"] button:hover,
-div[data-testid="stFileUploader"] button:hover,
-div[data-testid="stFileUploaderDropzone"] button:hover,
-div[data-testid="stFileUploader"] [data-testid="stBaseButton-secondary"]:hover {
-  background-color: var(--brand-primary-hover) !important;
-  border-color: var(--brand-primary-hover) !important;
-  color: #ffffff !important;
-}
-div.stButton > button:focus,
-div.stButton > button:focus-visible,
-div.stButton button:focus,
-div.stButton button:focus-visible,
-div.stFormSubmitButton > button:focus,
-div.stFormSubmitButton > button:focus-visible,
-div.stFormSubmitButton button:focus,
-div.stFormSubmitButton button:focus-visible,
-div[data-testid="stFormSubmitButton"] > button:focus,
-div[data-testid="stFormSubmitButton"] > button:focus-visible,
-div[data-testid="stFormSubmitButton"] button:focus,
-div[data-testid="stFormSubmitButton"] button:focus-visible,
-div.stDownloadButton > button:focus,
-div.stDownloadButton > button:focus-visible,
-div.stDownloadButton button:focus,
-div.stDownloadButton button:focus-visible,
-div[data-testid="stDownloadButton"] > button:focus,
-div[data-testid="stDownloadButton"] > button:focus-visible,
-div[data-testid="stDownloadButton"] button:focus,
-div[data-testid="stDownloadButton"] button:focus-visible,
-div[data-testid="stFileUploader"] button:focus,
-div[data-testid="stFileUploader"] button:focus-visible,
-div[data-testid="stFileUploaderDropzone"] button:focus,
-div[data-testid="stFileUploaderDropzone"] button:focus-visible,
-div[data-testid="stFileUploader"] [data-testid="stBaseButton-secondary"]:focus,
-div[data-testid="stFileUploader"] [data-testid="stBaseButton-secondary"]:focus-visible {
-  background-color: var(--brand-primary) !important;
-  border-color: var(--brand-primary) !important;
-  color: #ffffff !important;
-}
-div.stButton > button:active,
-div.stButton button:active,
-div.stFormSubmitButton > button:active,
-div.stFormSubmitButton button:active,
-div[data-testid="stFormSubmitButton"] button:active,
-div[data-testid="stFormSubmitButton"] > button:active,
-div.stDownloadButton > button:active,
-div.stDownloadButton button:active,
-div[data-testid="stDownloadButton"] > button:active,
-div[data-testid="stDownloadButton"] button:active,
-div[data-testid="stFileUploader"] button:active,
-div[data-testid="stFileUploaderDropzone"] button:active,
-div[data-testid="stFileUploader"] [data-testid="stBaseButton-secondary"]:active {
-  background-color: var(--brand-primary-hover) !important;
-  border-color: var(--brand-primary-hover) !important;
-  color: #ffffff !important;
-}
+@st.cache_data(show_spinner=False)
+def get_cached_w2_payload(
+    _content: bytes | memoryview, file_hash: str, render_scale: float, psm: int, fallback_year: int
+) -> dict[str, Any]:
+    """OCR an uploaded W-2 PDF, keyed on its content hash; the temp file is only written on a cache miss."""
+    temp_path = write_temp_pdf(_content)
+    try:
+        return w2_pdf_to_json_payload(temp_path, render_scale=render_scale, psm=psm, fallback_year=fallback_year)
+    finally:
+        temp_path.unlink(missing_ok=True)
 
-/* Tooltip Visibility */
-div[data-testid="stTooltipContent"] {
-    background-color: #333333 !important;
-    color: #ffffff !important;
-}
 
-/* Tooltip Fix (Attempt to override dark-on-dark if Streamlit inherits colors incorrectly) */
-div[data-testid="stTooltipContent"] {
-    background-color: #333333 !important;
-    color: #ffffff !important;
-}
-div[role="tooltip"] {
-    background-color: #333333 !important;
-    color: #ffffff !important;
-    font-size: 0.85rem;
-}
+@st.cache_data(show_spinner=False)
+def get_cached_config_w2_payload(
+    file_paths: tuple[str, ...],
+    base_dir_str: str,
+    tax_year: int,
+    render_scale: float,
+) -> dict[str, Any] | None:
+    return load_and_aggregate_w2s(list(file_paths), Path(base_dir_str), tax_year, pdf_render_scale=render_scale)
 
-/* Status Pills */
-.status-pill {
-  display: inline-flex;
-  align-items: center;
-  padding: 0.25rem 0.75rem;
-  border-radius: 9999px;
-  font-size: 0.75rem;
-  font-weight: 600;
-  text-transform: uppercase;
-}
-.status-match { background: #dcfce7; color: #166534; border: 1px solid #bbf7d0; }
-.status-mismatch { background: #fee2e2; color: #991b1b; border: 1px solid #fecaca; }
-.status-review { background: #fef9c3; color: #854d0e; border: 1px solid #fde047; }
-.status-missing { background: #f3f4f6; color: #4b5563; border: 1px solid #e5e7eb; }
-
-/* Run summary strip */
-.run-summary {
-  display: grid;
-  grid-template-columns: repeat(5, minmax(0, 1fr));
-  gap: 0.6rem;
-  margin: 0.25rem 0 0.85rem;
-}
-.run-item {
-  border: 1px solid var(--border-subtle);
-  border-radius: 8px;
-  background: var(--bg-surface);
-  padding: 0.5rem 0.65rem;
-}
-.run-item .label {
-  font-size: 0.7rem;
-  text-transform: uppercase;
-  letter-spacing: 0.04em;
-  color: var(--text-tertiary);
-  font-weight: 600;
-  margin-bottom: 0.2rem;
-}
-.run-item .value {
-  font-size: 0.9rem;
-  color: var(--text-primary);
-  font-weight: 600;
-  line-height: 1.2;
-  word-break: break-word;
-}
-.run-value-good { color: #166534 !important; }
-.run-value-warn { color: #b45309 !important; }
-.run-value-bad { color: #991b1b !important; }
-
-/* Extraction quality panel */
-.quality-panel {
-  border: 1px solid var(--border-subtle);
-  border-radius: 8px;
-  background: #f8fafc;
-  padding: 0.7rem 0.85rem;
-}
-.quality-head {
-  display: flex;
-  align-items: center;
-  gap: 0.5rem;
-  margin-bottom: 0.4rem;
-}
-.quality-chip {
-  display: inline-flex;
-  border-radius: 9999px;
-  font-size: 0.72rem;
-  padding: 0.14rem 0.55rem;
-  font-weight: 700;
-  text-transform: uppercase;
-}
-.quality-high { background: #dcfce7; color: #166534; }
-.quality-medium { background: #fef9c3; color: #854d0e; }
-.quality-low { background: #fee2e2; color: #991b1b; }
-
-/* Dataframe readability */
-div[data-testid="stDataFrame"] [role="columnheader"] {
-  font-weight: 700 !important;
-  background-color: #f1f5f9 !important;
-  color: #0f172a !important;
-  border-bottom: 1px solid var(--border-strong) !important;
-}
-div[data-testid="stDataFrame"] [role="columnheader"] * {
-  color: #0f172a !important;
-}
-div[data-testid="stDataFrame"] [role="gridcell"] {
-  line-height: 1.35 !important;
-}
-div[data-testid="stDataFrame"] [role="gridcell"] [data-testid="stMarkdownContainer"] p {
-  margin: 0 !important;
-}
 
-/* Expander readability */
-div[data-testid="stExpander"] details {
-  border: 1px solid var(--border-subtle) !important;
-  border-radius: 8px !important;
-  background: #ffffff !important;
-}
-div[data-testid="stExpander"] summary {
-  background: var(--bg-surface) !important;
-  color: var(--text-primary) !important;
-  border-radius: 8px !important;
-}
-div[data-testid="stExpander"] summary * {
-  color: var(--text-primary) !important;
-}
-div[data-testid="stExpander"] summary:hover {
-  background: var(--bg-subtle) !important;
-}
+@st.cache_data(show_spinner=False)
+def get_cached_paystub_files(paystubs_dir_str: str, year: int, dir_mtime_ns: int) -> list[Path]:
+    return list_paystub_files(Path(paystubs_dir_str), year)
 
-/* Popover as clickable info icon */
-div[data-testid="stPopover"] button {
-  width: 2rem !important;
-  min-width: 2rem !important;
-  height: 2rem !important;
-  padding: 0 !important;
-  border-radius: 999px !important;
-  background: #e8f2f7 !important;
-  color: #0f5d75 !important;
-  border: 1px solid #b8d0db !important;
-  font-weight: 700 !important;
-}
-div[data-testid="stPopover"] button:hover,
-div[data-testid="stPopover"] button:focus-visible {
-  background: #d8eaf3 !important;
-  border-color: #8eb3c4 !important;
-  color: #0b4a5d !important;
-}
-[data-baseweb="popover"] {
-  max-width: min(92vw, 520px) !important;
-}
-[data-baseweb="popover"] * {
-  color: var(--text-primary) !important;
-}
-[data-baseweb="popover"] p,
-[data-baseweb="popover"] li {
-  color: var(--text-primary) !important;
-}
 
-/* Top-right Streamlit main menu readability (next to Deploy) */
-div[data-testid="stMainMenuPopover"],
-div[data-testid="stMainMenuPopover"] > div,
-div[data-testid="stMainMenuPopover"] [role="menu"] {
-  background: var(--bg-core) !important;
-  color: var(--text-primary) !important;
-  border-color: var(--border-strong) !important;
-}
-div[data-testid="stMainMenuPopover"] [role="menuitem"],
-div[data-testid="stMainMenuPopover"] [role="menuitem"] * {
-  color: var(--text-primary) !important;
-  background: transparent !important;
-}
-div[data-testid="stMainMenuPopover"] a,
-div[data-testid="stMainMenuPopover"] a *,
-div[data-testid="stMainMenuPopover"] button,
-div[data-testid="stMainMenuPopover"] button *,
-div[data-testid="stMainMenuPopover"] [role="link"],
-div[data-testid="stMainMenuPopover"] [role="link"] * {
-  color: var(--text-primary) !important;
-  background: transparent !important;
-  box-shadow: none !important;
-}
-div[data-testid="stMainMenuPopover"] [role="menuitem"]:hover,
-div[data-testid="stMainMenuPopover"] [role="menuitem"]:focus-visible {
-  background: var(--bg-subtle) !important;
-  color: var(--text-primary) !important;
-}
-div[data-testid="stMainMenuPopover"] a:hover,
-div[data-testid="stMainMenuPopover"] button:hover,
-div[data-testid="stMainMenuPopover"] [role="link"]:hover,
-div[data-testid="stMainMenuPopover"] a:focus-visible,
-div[data-testid="stMainMenuPopover"] button:focus-visible,
-div[data-testid="stMainMenuPopover"] [role="link"]:focus-visible {
-  background: var(--bg-subtle) !important;
-  color: var(--text-primary) !important;
-}
+def directory_mtime_ns(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return 0
 
-/* Fallback for Streamlit/BaseWeb menu portal structures */
-[data-baseweb="popover"] [role="menu"] {
-  background: var(--bg-core) !important;
-  color: var(--text-primary) !important;
-  border: 1px solid var(--border-strong) !important;
-}
-[data-baseweb="popover"] [role="menu"] > *,
-[data-baseweb="popover"] [role="menu"] [role="none"],
-[data-baseweb="popover"] [role="menu"] ul,
-[data-baseweb="popover"] [role="menu"] li,
-[data-baseweb="popover"] [role="menu"] div {
-  background: transparent !important;
-  color: var(--text-primary) !important;
-}
-[data-baseweb="popover"] [role="menu"] [role="menuitem"],
-[data-baseweb="popover"] [role="menu"] a,
-[data-baseweb="popover"] [role="menu"] button,
-[data-baseweb="popover"] [role="menu"] [role="link"] {
-  background: transparent !important;
-  color: var(--text-primary) !important;
-  box-shadow: none !important;
-}
-[data-baseweb="popover"] [role="menu"] [role="menuitem"] *,
-[data-baseweb="popover"] [role="menu"] a *,
-[data-baseweb="popover"] [role="menu"] button *,
-[data-baseweb="popover"] [role="menu"] [role="link"] * {
-  color: var(--text-primary) !important;
-  background: transparent !important;
-}
-[data-baseweb="popover"] [role="menu"] [role="menuitem"]:hover,
-[data-baseweb="popover"] [role="menu"] [role="menuitem"]:focus-visible,
-[data-baseweb="popover"] [role="menu"] a:hover,
-[data-baseweb="popover"] [role="menu"] a:focus-visible,
-[data-baseweb="popover"] [role="menu"] button:hover,
-[data-baseweb="popover"] [role="menu"] button:focus-visible,
-[data-baseweb="popover"] [role="menu"] [role="link"]:hover,
-[data-baseweb="popover"] [role="menu"] [role="link"]:focus-visible {
-  background: var(--bg-subtle) !important;
-  color: var(--text-primary) !important;
-}
 
-/* Explicit Streamlit main menu list rows (role=option) */
-[data-testid="stMainMenuList"] {
-  background: var(--bg-core) !important;
-  color: var(--text-primary) !important;
-}
-[data-testid="stMainMenuList"] li,
-[data-testid="stMainMenuList"] ul,
-[data-testid="stMainMenuList"] [role="option"],
-[data-testid="stMainMenuList"] [role="option"] *,
-[data-testid="stMainMenuList"] li *,
-[data-testid="stMainMenuList"] span,
-[data-testid="stMainMenuList"] kbd {
-  color: var(--text-primary) !important;
-}
-[data-testid="stMainMenuList"] li,
-[data-testid="stMainMenuList"] [role="option"] {
-  background: var(--bg-core) !important;
-}
-[data-testid="stMainMenuList"] li:hover,
-[data-testid="stMainMenuList"] li:focus-visible,
-[data-testid="stMainMenuList"] [role="option"]:hover,
-[data-testid="stMainMenuList"] [role="option"]:focus-visible {
-  background: var(--bg-subtle) !important;
-}
-
-/* Workflow Step Tracker */
-.workflow-steps {
-  display: grid;
-  grid-template-columns: repeat(3, minmax(0, 1fr));
-  gap: 0.65rem;
-  margin: 0.25rem 0 1.0rem;
-}
-.workflow-step {
-  border: 1px solid var(--border-subtle);
-  border-radius: 8px;
-  background: var(--bg-surface);
-  padding: 0.55rem 0.7rem;
-}
-.workflow-step.active {
-  border-color: var(--brand-primary);
-  box-shadow: 0 0 0 1px rgba(15, 93, 117, 0.25);
-}
-.workflow-step .step-title {
-  font-size: 0.8rem;
-  font-weight: 600;
-  color: var(--text-primary);
-}
-.workflow-step .step-state {
-  display: inline-flex;
-  margin-top: 0.3rem;
-  border-radius: 9999px;
-  padding: 0.15rem 0.55rem;
-  font-size: 0.72rem;
-  font-weight: 600;
-  text-transform: uppercase;
-}
-.workflow-step .state-not-run,
-.workflow-step .state-locked {
-  background: #f3f4f6;
-  color: #4b5563;
-}
-.workflow-step .state-in-progress {
-  background: #dbeafe;
-  color: #1d4ed8;
-}
-.workflow-step .state-completed {
-  background: #dcfce7;
-  color: #166534;
-}
-.workflow-step .state-needs-review {
-  background: #fee2e2;
-  color: #991b1b;
-}
-@media (max-width: 980px) {
-  .app-topline-title {
-    left: 2.6rem;
-    font-size: 1.1rem;
-    max-width: calc(100vw - 11rem);
-  }
-  [data-testid="stSidebar"][aria-expanded="true"] + div .app-topline-title {
-    left: calc(300px + 0.6rem) !important;
-    max-width: calc(100vw - 300px - 9rem) !important;
-  }
-  [data-testid="stSidebar"][aria-expanded="false"] + div .app-topline-title {
-    left: 2.6rem !important;
-    max-width: calc(100vw - 9rem) !important;
-  }
-  .step-heading {
-    flex-direction: column;
-    gap: 0.4rem;
-    padding: 0.55rem 0.65rem;
-  }
-  .run-summary {
-    grid-template-columns: 1fr;
-  }
-  .workflow-steps {
-    grid-template-columns: 1fr;
-  }
-  div[data-testid="stElementContainer"]:has(> div[data-testid="stButton"]),
-  div[data-testid="stElementContainer"]:has(> div[data-testid="stFormSubmitButton"]),
-  div[data-testid="stElementContainer"]:has(> div[data-testid="stDownloadButton"]),
-  div[data-testid="stElementContainer"]:has(> div[data-testid="stFileUploader"]),
-  div[data-testid="stElementContainer"]:has(> div[data-testid="stFileUploaderDropzone"]) {
-    width: 100% !important;
-  }
-  div.stButton,
-  div[data-testid="stButton"],
-  div[data-testid="stFormSubmitButton"],
-  div.stDownloadButton,
-  div[data-testid="stDownloadButton"],
-  div[data-testid="stFileUploader"],
-  div[data-testid="stFileUploaderDropzone"] {
-    width: 100% !important;
-  }
-  div.stButton > button,
-  div.stButton button,
-  div[data-testid="stFormSubmitButton"] > button,
-  div[data-testid="stFormSubmitButton"] button,
-  div.stDownloadButton > button,
-  div.stDownloadButton button,
-  div[data-testid="stDownloadButton"] > button,
-  div[data-testid="stDownloadButton"] button,
-  div[data-testid="stFileUploader"] button,
-  div[data-testid="stFileUploaderDropzone"] button,
-  div[data-testid="stFileUploader"] [data-testid="stBaseButton-secondary"] {
-    width: 100% !important;
-    min-width: 100% !important;
-    max-width: 100% !important;
-  }
-}
+build_tax_filing_package = annual_module.build_tax_filing_package
+collect_annual_snapshots = annual_module.collect_annual_snapshots
+package_to_markdown = annual_module.package_to_markdown
 
-/* Code blocks */
-code {
-  color: var(--brand-primary);
-  background: var(--bg-subtle);
-  padding: 0.1rem 0.3rem;
-  border-radius: 4px;
-}
-</style>
-        """,
-        unsafe_allow_html=True,
-    )
+APP_SESSION_SCHEMA_VERSION = "2026-02-25-household-w2-defaults-v1"
+ButtonKind = Literal["primary", "secondary", "tertiary"]
 
+DEFAULT_PRIMARY_PAYSTUB_DIR = "pay_statements"
+DEFAULT_SPOUSE_PAYSTUB_DIR = "pay_statements/spouse"
+UI_ASSETS_DIR = Path(__file__).resolve().parent / "assets"
 
-def clear_workflow_state() -> None:
-    keys_to_clear = [
+# Session keys dropped whenever the extraction scope or household setup changes.
+WORKFLOW_STATE_KEYS = frozenset(
+    {
         "snapshot",
         "annual_summary_preview",
         "analysis_scope",
@@ -927,22 +260,129 @@ def clear_workflow_state() -> None:
         "w2_validation",
         "extract_run_meta",
         "extract_quality",
+        "_quality_snapshot",
         "pay_date_overrides",
         "_w2_autofilled_fields",
         "manual_w2_prefill_source",
         "manual_w2_states",
         "_w2_config_loaded_tag",
+        "_report_markdown",
+        "_snapshot_dict",
+        "_ledger_df_cache",
+        "_packet_artifacts",
+        "_packet_sig",
+        "_comparison_df",
+        "_styler_cache",
         "box1",
         "box2",
         "box3",
         "box4",
         "box5",
         "box6",
-    ]
-    for key in list(st.session_state.keys()):
-        if not isinstance(key, str):
-            continue
-        if key in keys_to_clear or key.startswith("box16_") or key.startswith("box17_"):
+    }
+)
+WORKFLOW_STATE_KEY_PREFIXES = ("box16_", "box17_")
+# Cleared on top of the workflow keys when the household setup is reopened.
+HOUSEHOLD_EDIT_STATE_KEYS = frozenset({"household_package", "corrections"})
+HOUSEHOLD_EDIT_STATE_KEY_PREFIXES = ("filer_",)
+FLAGGED_COMPARISON_STATUSES = frozenset({"mismatch", "review_needed"})
+FLAGGED_ROW_STYLE = "background-color: #fef2f2; color: #b91c1c; font-weight: 600"
+PAY_DATE_EDITOR_COLUMNS = ("File", "Detected Pay Date", "Assigned Pay Date")
+ISO_DATE_RE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+format_currency_amount = "${:,.2f}".format
+QUALITY_CHIP_CLASSES = {"High": "quality-high", "Medium": "quality-medium", "Low": "quality-low"}
+CONFIDENCE_RUN_CLASSES = {"High": "run-value-good", "Medium": "run-value-warn", "Low": "run-value-bad"}
+AUTO_HEAL_CODES: frozenset[str] = frozenset(
+    {
+        "zero_period_ytd_promoted",
+        "state_ytd_underflow_corrected",
+        "state_ytd_outlier_corrected",
+        "gross_ytd_repaired",
+        "gross_this_period_repaired",
+        "implausible_amount_filtered",
+    }
+)
+AUTO_HEAL_COLUMNS = ("Code", "Field", "Old Interpretation", "New Interpretation", "Reason", "Evidence")
+LEDGER_DF_CACHE_SIZE = 8
+W2_MIN_RENDER_SCALE = 3.0
+EVIDENCE_TABLE_COLUMNS = ("Field", "Evidence")
+CORRECTION_TRACE_COLUMNS = ("Field", "Original Value", "Corrected Value", "Reason", "Timestamp")
+STATUS_PILLS = {
+    status: f"<span class='status-pill {klass}'>{status}</span>"
+    for status, klass in (
+        ("match", "status-match"),
+        ("mismatch", "status-mismatch"),
+        ("review_needed", "status-review"),
+    )
+}
+STEP_STATE_CLASSES = {
+    "Completed": "state-completed",
+    "In progress": "state-in-progress",
+    "Locked": "state-locked",
+    "Needs review": "state-needs-review",
+    "Not run": "state-not-run",
+}
+EVIDENCE_FIELD_KEYS = ("gross_pay", "federal_income_tax", "social_security_tax", "medicare_tax", "k401_contrib")
+
+# Manual W-2 form widget keys and the W-2 payload fields they mirror.
+MANUAL_W2_BOX_FIELDS: tuple[tuple[str, str], ...] = (
+    ("box1", "box_1_wages_tips_other_comp"),
+    ("box2", "box_2_federal_income_tax_withheld"),
+    ("box3", "box_3_social_security_wages"),
+    ("box4", "box_4_social_security_tax_withheld"),
+    ("box5", "box_5_medicare_wages_and_tips"),
+    ("box6", "box_6_medicare_tax_withheld"),
+)
+# Sorted view of the W-2 parser's state set, so the UI lists and the parser cannot drift apart.
+STATE_CODES: tuple[str, ...] = tuple(sorted(US_STATE_CODES))
+# Fields selectable in the annual corrections editor.
+CORRECTION_FIELD_OPTIONS: tuple[str, ...] = (
+    *(key for key, _ in MANUAL_W2_BOX_FIELDS),
+    *(f"state_income_tax_{state}" for state in STATE_CODES),
+)
+STATE_TAX_YTD_LABELS: dict[str, str] = {state: f"{state} Tax YTD" for state in STATE_CODES}
+
+
+THEME_FONTS_URL = "https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&family=JetBrains+Mono:wght@400;500&display=swap"
+# Linked rather than @import-ed from the stylesheet, so the font fetch starts without waiting on CSS parsing,
+# with the connections to both font hosts opened up front.
+THEME_FONT_LINKS = (
+    '<link rel="preconnect" href="https://fonts.googleapis.com">'
+    '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>'
+    f'<link rel="stylesheet" href="{THEME_FONTS_URL}">'
+)
+CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+CSS_WHITESPACE_RE = re.compile(r"\s+")
+CSS_PUNCTUATION_SPACE_RE = re.compile(r"\s*([{};])\s*")
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and collapse whitespace; the stylesheet has no string literals that could contain either."""
+    css = CSS_COMMENT_RE.sub("", css)
+    css = CSS_WHITESPACE_RE.sub(" ", css)
+    return CSS_PUNCTUATION_SPACE_RE.sub(r"\1", css).strip()
+
+
+@st.cache_resource(show_spinner=False)
+def load_theme_style() -> str:
+    css = (UI_ASSETS_DIR / "app.css").read_text(encoding="utf-8")
+    return f"<style>{minify_css(css)}</style>"
+
+
+def apply_theme() -> None:
+    # Streamlit drops elements a rerun does not emit again, so the stylesheet cannot be sent once per session;
+    # keeping the cached markup small is what bounds the per-rerun cost.
+    st.markdown(THEME_FONT_LINKS, unsafe_allow_html=True)
+    # Style-only st.html skips the Markdown parser and goes to the event container, taking no layout space.
+    st.html(load_theme_style())
+
+
+def clear_workflow_state(extra_keys: frozenset[str] = frozenset(), extra_prefixes: tuple[str, ...] = ()) -> None:
+    keys = WORKFLOW_STATE_KEYS | extra_keys if extra_keys else WORKFLOW_STATE_KEYS
+    prefixes = WORKFLOW_STATE_KEY_PREFIXES + extra_prefixes
+    # The app only writes string keys, so no per-key type check is needed here.
+    for key in cast(list[str], list(st.session_state.keys())):
+        if key in keys or key.startswith(prefixes):
             st.session_state.pop(key, None)
 
 
@@ -956,20 +396,58 @@ def reset_session_if_schema_changed() -> None:
     st.session_state["_app_schema_version"] = APP_SESSION_SCHEMA_VERSION
 
 
-def to_decimal(value: Any) -> Decimal | None:
-    if value in (None, ""):
-        return None
+@functools.lru_cache(maxsize=4096)
+def _to_decimal_cached(text: str) -> Decimal | None:
     try:
-        return Decimal(str(value))
+        return Decimal(text)
     except (ArithmeticError, ValueError, TypeError):
         return None
 
 
+def to_decimal(value: Any) -> Decimal | None:
+    if value in (None, ""):
+        return None
+    return _to_decimal_cached(str(value))
+
+
+def state_ytd_text(state_val: Any) -> str | None:
+    # Handle if state_val is AmountPair object or dict, else assume scalar or Decimal
+    if hasattr(state_val, "ytd"):
+        val = state_val.ytd
+    elif isinstance(state_val, dict):
+        val = state_val.get("ytd")
+    else:
+        val = state_val
+    return None if val is None else str(val)
+
+
+@functools.lru_cache(maxsize=64)
+def sum_decimal_texts(texts: tuple[str, ...]) -> Decimal:
+    total = Decimal("0.00")
+    for text in texts:
+        total += Decimal(text)
+    return total
+
+
+def safe_sum_state_ytd(state_data: dict[str, Any]) -> Decimal:
+    texts = tuple(text for text in map(state_ytd_text, state_data.values()) if text is not None)
+    return sum_decimal_texts(texts)
+
+
+# Equal Decimals such as 1.0 and 1.00 share an entry; format_money rounds both to cents.
+cached_format_money = functools.lru_cache(maxsize=512)(format_money)
+
+
+@functools.lru_cache(maxsize=512)
+def format_money_text(value_text: str) -> str:
+    return format_money(Decimal(value_text))
+
+
 def format_currency_display(value: Any) -> str:
     amount = to_decimal(value)
     if amount is None:
         return "—"
-    return f"${amount:,.2f}"
+    return format_currency_amount(amount)
 
 
 def format_plain_display(value: Any) -> str:
@@ -987,18 +465,38 @@ def format_state_map_display(value: Any) -> str:
     return ", ".join(pairs) if pairs else "—"
 
 
-def display_file_name(value: Any) -> str:
-    text = format_plain_display(value)
-    if text in {"—", ""}:
-        return "—"
-    if text.startswith("ALL ("):
-        return text
-    normalized = str(text).replace("\\", "/")
-    base_name = normalized.rsplit("/", 1)[-1]
-    return base_name or text
+def extraction_quality_key(snapshot: PaystubSnapshot) -> tuple[Any, ...]:
+    """Summarize every snapshot input that influences the extraction quality score."""
+    return (
+        snapshot.gross_pay.ytd,
+        snapshot.federal_income_tax.ytd,
+        snapshot.social_security_tax.ytd,
+        snapshot.medicare_tax.ytd,
+        tuple(
+            bool(pair.source_line)
+            for pair in (
+                snapshot.gross_pay,
+                snapshot.federal_income_tax,
+                snapshot.social_security_tax,
+                snapshot.medicare_tax,
+                snapshot.k401_contrib,
+            )
+        ),
+        tuple(sorted((state, bool(pair.source_line)) for state, pair in snapshot.state_income_tax.items())),
+        tuple(str(anomaly.get("code")) for anomaly in snapshot.parse_anomalies),
+    )
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_cached_extraction_quality(snapshot_key: tuple[Any, ...], _snapshot: PaystubSnapshot) -> dict[str, Any]:
+    return score_extraction_quality(_snapshot)
 
 
 def build_extraction_quality(snapshot: PaystubSnapshot) -> dict[str, Any]:
+    return get_cached_extraction_quality(extraction_quality_key(snapshot), snapshot)
+
+
+def score_extraction_quality(snapshot: PaystubSnapshot) -> dict[str, Any]:
     issues: list[dict[str, str]] = []
     score = 100
 
@@ -1026,15 +524,17 @@ def build_extraction_quality(snapshot: PaystubSnapshot) -> dict[str, Any]:
         issues.append({"severity": "warning", "message": "No state tax entries were detected in this payslip."})
         score -= 10
 
-    evidence_lines = [
-        snapshot.gross_pay.source_line,
-        snapshot.federal_income_tax.source_line,
-        snapshot.social_security_tax.source_line,
-        snapshot.medicare_tax.source_line,
-        snapshot.k401_contrib.source_line,
-        *[pair.source_line for pair in snapshot.state_income_tax.values()],
-    ]
-    evidence_count = sum(1 for line in evidence_lines if line)
+    evidence_count = sum(
+        1
+        for pair in (
+            snapshot.gross_pay,
+            snapshot.federal_income_tax,
+            snapshot.social_security_tax,
+            snapshot.medicare_tax,
+            snapshot.k401_contrib,
+        )
+        if pair.source_line
+    ) + sum(1 for pair in snapshot.state_income_tax.values() if pair.source_line)
     if evidence_count < 5:
         issues.append({"severity": "warning", "message": "Low evidence coverage detected; verify OCR output lines."})
         score -= 10
@@ -1058,9 +558,7 @@ def render_extraction_quality_panel(quality: dict[str, Any]) -> None:
     score = int(quality.get("score", 0))
     issue_rows = cast(list[dict[str, str]], quality.get("issues", []))
     evidence_count = int(quality.get("evidence_count", 0))
-    chip_class = (
-        "quality-high" if confidence == "High" else "quality-medium" if confidence == "Medium" else "quality-low"
-    )
+    chip_class = QUALITY_CHIP_CLASSES.get(confidence, "quality-low")
 
     issue_markdown = ""
     if issue_rows:
@@ -1075,7 +573,7 @@ def render_extraction_quality_panel(quality: dict[str, Any]) -> None:
     else:
         issue_markdown = "<p>No extraction warnings detected.</p>"
 
-    st.markdown(
+    st.html(
         (
             "<div class='quality-panel'>"
             "<div class='quality-head'>"
@@ -1086,15 +584,41 @@ def render_extraction_quality_panel(quality: dict[str, Any]) -> None:
             f"{issue_markdown}"
             "</div>"
         ),
-        unsafe_allow_html=True,
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def build_run_summary_markup(
+    tax_year: int,
+    file_count: int,
+    last_run_text: str,
+    last_run_class: str,
+    mismatch_count: int,
+    ready_text: str,
+    ready_class: str,
+    confidence_text: str,
+    confidence_class: str,
+) -> str:
+    mismatch_class = "run-value-good" if mismatch_count == 0 else "run-value-bad"
+    return (
+        "<div class='run-summary'>"
+        f"<div class='run-item'><div class='label'>Tax Year</div><div class='value'>{tax_year}</div></div>"
+        f"<div class='run-item'><div class='label'>Paystubs Found</div><div class='value'>{file_count}</div></div>"
+        f"<div class='run-item'><div class='label'>Last Extraction</div><div class='value {last_run_class}'>{last_run_text}</div></div>"
+        f"<div class='run-item'><div class='label'>Step 2 Flags</div><div class='value {mismatch_class}'>{mismatch_count}</div></div>"
+        f"<div class='run-item'><div class='label'>Ready To File</div><div class='value {ready_class}'>{ready_text}</div>"
+        f"<div class='label' style='margin-top:0.25rem;'>Extraction Confidence</div>"
+        f"<div class='value {confidence_class}'>{confidence_text}</div></div>"
+        "</div>"
     )
 
 
 def render_run_summary(tax_year: int, file_count: int) -> None:
-    run_meta = cast(dict[str, Any], st.session_state.get("extract_run_meta", {}))
-    quality_meta = cast(dict[str, Any], st.session_state.get("extract_quality", {}))
-    w2_validation = cast(dict[str, Any], st.session_state.get("w2_validation", {}))
-    packet = cast(dict[str, Any], st.session_state.get("annual_packet", {}))
+    session = st.session_state
+    run_meta: dict[str, Any] = session.get("extract_run_meta") or {}
+    quality_meta: dict[str, Any] = session.get("extract_quality") or {}
+    w2_validation: dict[str, Any] = session.get("w2_validation") or {}
+    packet: dict[str, Any] = session.get("annual_packet") or {}
 
     last_run_text = "Not run"
     last_run_class = "run-value-warn"
@@ -1110,7 +634,7 @@ def render_run_summary(tax_year: int, file_count: int) -> None:
 
     mismatch_count = 0
     if w2_validation:
-        summary = cast(dict[str, Any], w2_validation.get("comparison_summary", {}))
+        summary: dict[str, Any] = w2_validation.get("comparison_summary") or {}
         mismatch_count = int(summary.get("mismatch", 0)) + int(summary.get("review_needed", 0))
 
     ready_text = "Pending"
@@ -1124,69 +648,138 @@ def render_run_summary(tax_year: int, file_count: int) -> None:
     confidence_class = "run-value-warn"
     if quality_meta:
         confidence_text = str(quality_meta.get("confidence", "Pending"))
-        confidence_class = (
-            "run-value-good"
-            if confidence_text == "High"
-            else "run-value-warn"
-            if confidence_text == "Medium"
-            else "run-value-bad"
-        )
-
-    mismatch_class = "run-value-good" if mismatch_count == 0 else "run-value-bad"
-
-    st.markdown(
-        (
-            "<div class='run-summary'>"
-            f"<div class='run-item'><div class='label'>Tax Year</div><div class='value'>{tax_year}</div></div>"
-            f"<div class='run-item'><div class='label'>Paystubs Found</div><div class='value'>{file_count}</div></div>"
-            f"<div class='run-item'><div class='label'>Last Extraction</div><div class='value {last_run_class}'>{last_run_text}</div></div>"
-            f"<div class='run-item'><div class='label'>Step 2 Flags</div><div class='value {mismatch_class}'>{mismatch_count}</div></div>"
-            f"<div class='run-item'><div class='label'>Ready To File</div><div class='value {ready_class}'>{ready_text}</div>"
-            f"<div class='label' style='margin-top:0.25rem;'>Extraction Confidence</div>"
-            f"<div class='value {confidence_class}'>{confidence_text}</div></div>"
-            "</div>"
+        confidence_class = CONFIDENCE_RUN_CLASSES.get(confidence_text, "run-value-bad")
+
+    st.html(
+        build_run_summary_markup(
+            tax_year,
+            file_count,
+            last_run_text,
+            last_run_class,
+            mismatch_count,
+            ready_text,
+            ready_class,
+            confidence_text,
+            confidence_class,
         ),
-        unsafe_allow_html=True,
     )
 
 
+def flagged_row_mask(df: pd.DataFrame, flag_column: str) -> pd.Series:
+    if flag_column not in df.columns:
+        return pd.Series(False, index=df.index)
+    return df[flag_column].astype(str).ne("—")
+
+
+def flagged_row_styles(df: pd.DataFrame, flag_mask: pd.Series) -> pd.DataFrame:
+    styles = pd.DataFrame("", index=df.index, columns=df.columns)
+    styles.loc[flag_mask, :] = FLAGGED_ROW_STYLE
+    return styles
+
+
 def style_flagged_rows(
-    df: pd.DataFrame, flag_column: str, right_align_columns: list[str] | None = None
+    df: pd.DataFrame,
+    flag_column: str,
+    flag_mask: pd.Series | None = None,
 ) -> pd.io.formats.style.Styler:
-    def apply_row_style(row: pd.Series) -> list[str]:
-        flagged = str(row.get(flag_column, "—")) != "—"
-        if not flagged:
-            return [""] * len(row)
-        return ["background-color: #fef2f2; color: #b91c1c; font-weight: 600"] * len(row)
-
-    styled = df.style.apply(apply_row_style, axis=1)
-    if right_align_columns:
-        available = [col for col in right_align_columns if col in df.columns]
-        if available:
-            styled = styled.set_properties(
-                subset=available,
-                **{"text-align": "right", "font-family": "'JetBrains Mono', monospace"},
-            )
+    styled = df.style
+    if flag_mask is None:
+        flag_mask = flagged_row_mask(df, flag_column)
+    # Skip the style-matrix pass entirely on the common path where no row is flagged.
+    if flag_mask.any():
+        styled = styled.apply(flagged_row_styles, axis=None, flag_mask=flag_mask)
     return styled
 
 
+def cached_flagged_styler(
+    df: pd.DataFrame,
+    flag_column: str,
+    flag_mask: pd.Series | None = None,
+) -> pd.io.formats.style.Styler:
+    """Reuse the flagged-row Styler for a display frame object held in session state."""
+    cache: dict[tuple[int, str], tuple[pd.DataFrame, pd.io.formats.style.Styler]] = st.session_state.setdefault(
+        "_styler_cache", {}
+    )
+    key = (id(df), flag_column)
+    cached = cache.get(key)
+    if cached is not None and cached[0] is df:
+        return cached[1]
+    if len(cache) >= LEDGER_DF_CACHE_SIZE:
+        cache.clear()
+    styled = style_flagged_rows(df, flag_column, flag_mask=flag_mask)
+    cache[key] = (df, styled)
+    return styled
+
+
+def records_column(df: pd.DataFrame, key: str) -> pd.Series:
+    if key in df.columns:
+        values = df[key].astype(object)
+        return values.where(values.notna(), None)
+    return pd.Series([None] * len(df), index=df.index, dtype=object)
+
+
+def plain_series(values: pd.Series) -> pd.Series:
+    """Vectorized format_plain_display: blanks become an em dash, everything else its str()."""
+    return values.astype(str).where(values.notna() & values.ne(""), "—")
+
+
+def file_name_series(values: pd.Series) -> pd.Series:
+    """Vectorized basename for ledger file paths; aggregate "ALL (...)" labels pass through unchanged."""
+    text = values.astype(str)
+    names = text.str.replace(r"^.*[/\\]", "", regex=True)
+    names = names.where(names.ne("") & ~text.str.startswith("ALL ("), text)
+    return names.where(values.notna() & values.ne(""), "—")
+
+
+def currency_series(values: pd.Series) -> pd.Series:
+    """Coerce money values to floats; dollar formatting happens client-side via column_config."""
+    return pd.to_numeric(values, errors="coerce")
+
+
+def cached_comparison_display_df(rows: list[dict[str, Any]]) -> pd.DataFrame:
+    """Build the W-2 comparison display frame once per distinct comparison list held in session state."""
+    cached = st.session_state.get("_comparison_df")
+    if cached is not None:
+        if cached[0] is rows:
+            return cast(pd.DataFrame, cached[1])
+        # Re-running the comparison with unchanged inputs yields an equal list; keep the frame (and its Styler).
+        if cached[0] == rows:
+            st.session_state["_comparison_df"] = (rows, cached[1])
+            return cast(pd.DataFrame, cached[1])
+    comparison_df = build_comparison_display_df(rows)
+    st.session_state["_comparison_df"] = (rows, comparison_df)
+    return comparison_df
+
+
 def build_comparison_display_df(rows: list[dict[str, Any]]) -> pd.DataFrame:
-    display_rows: list[dict[str, str]] = []
-    for row in rows:
-        status_raw = str(row.get("status", ""))
-        status = status_raw.replace("_", " ").title()
-        severity = "Flagged" if status_raw in {"mismatch", "review_needed"} else "OK"
-        display_rows.append(
-            {
-                "Field": format_plain_display(row.get("field")),
-                "Paystub": format_currency_display(row.get("paystub")),
-                "W-2": format_currency_display(row.get("w2")),
-                "Difference": format_currency_display(row.get("difference")),
-                "Status": status,
-                "Flag": severity if severity == "Flagged" else "—",
-            }
-        )
-    return pd.DataFrame(display_rows)
+    if not rows:
+        return pd.DataFrame()
+    source = pd.DataFrame.from_records(rows)
+    status_raw = records_column(source, "status").fillna("").astype(str)
+    flagged = status_raw.isin(FLAGGED_COMPARISON_STATUSES)
+    return pd.DataFrame(
+        {
+            "Field": plain_series(records_column(source, "field")),
+            "Paystub": currency_series(records_column(source, "paystub")),
+            "W-2": currency_series(records_column(source, "w2")),
+            "Difference": currency_series(records_column(source, "difference")),
+            "Status": status_raw.str.replace("_", " ").str.title(),
+            "Flag": pd.Series("Flagged", index=source.index).where(flagged, "—"),
+        }
+    )
+
+
+LEDGER_CURRENCY_COLUMNS: tuple[tuple[str, str], ...] = (
+    ("Gross YTD", "gross_pay_ytd"),
+    ("Federal YTD", "federal_tax_ytd"),
+    ("SS YTD", "social_security_tax_ytd"),
+    ("Medicare YTD", "medicare_tax_ytd"),
+    ("State YTD Total", "state_tax_ytd_total"),
+)
+LEDGER_COLUMN_CONFIG = {label: st.column_config.NumberColumn(format="dollar") for label, _ in LEDGER_CURRENCY_COLUMNS}
+COMPARISON_COLUMN_CONFIG = {
+    label: st.column_config.NumberColumn(format="dollar") for label in ("Paystub", "W-2", "Difference")
+}
 
 
 def build_ledger_display_df(
@@ -1195,30 +788,39 @@ def build_ledger_display_df(
 ) -> pd.DataFrame:
     if not ledger:
         return pd.DataFrame()
-    rows: list[dict[str, str]] = []
-    for row_num, row in enumerate(ledger, start=1):
-        record = {
-            "S.No": str(row_num),
-            "Pay Date": format_plain_display(row.get("pay_date")),
-            "File": display_file_name(row.get("file")),
-        }
-        if include_calc_columns:
-            record["Calculation Status"] = format_plain_display(row.get("calculation_status"))
-            record["Canonical File"] = display_file_name(row.get("canonical_file"))
+    source = pd.DataFrame.from_records(ledger)
+    columns: dict[str, pd.Series] = {
+        "S.No": pd.Series(range(1, len(source) + 1), index=source.index).astype(str),
+        "Pay Date": plain_series(records_column(source, "pay_date")),
+        "File": file_name_series(records_column(source, "file")),
+    }
+    if include_calc_columns:
+        columns["Calculation Status"] = plain_series(records_column(source, "calculation_status"))
+        columns["Canonical File"] = file_name_series(records_column(source, "canonical_file"))
+    for label, key in LEDGER_CURRENCY_COLUMNS:
+        columns[label] = currency_series(records_column(source, key))
+    columns["State YTD By State"] = records_column(source, "state_tax_ytd_by_state").map(format_state_map_display)
+    columns["YTD Verification"] = plain_series(records_column(source, "ytd_verification"))
+    return pd.DataFrame(columns)
 
-        record.update(
-            {
-                "Gross YTD": format_currency_display(row.get("gross_pay_ytd")),
-                "Federal YTD": format_currency_display(row.get("federal_tax_ytd")),
-                "SS YTD": format_currency_display(row.get("social_security_tax_ytd")),
-                "Medicare YTD": format_currency_display(row.get("medicare_tax_ytd")),
-                "State YTD Total": format_currency_display(row.get("state_tax_ytd_total")),
-                "State YTD By State": format_state_map_display(row.get("state_tax_ytd_by_state")),
-                "YTD Verification": format_plain_display(row.get("ytd_verification")),
-            }
-        )
-        rows.append(record)
-    return pd.DataFrame(rows)
+
+def cached_ledger_display_df(
+    ledger: list[dict[str, Any]],
+    include_calc_columns: bool = False,
+) -> pd.DataFrame:
+    """Build the ledger display frame once per ledger list held in session state."""
+    cache: dict[tuple[int, bool], tuple[list[dict[str, Any]], pd.DataFrame]] = st.session_state.setdefault(
+        "_ledger_df_cache", {}
+    )
+    key = (id(ledger), include_calc_columns)
+    cached = cache.get(key)
+    if cached is not None and cached[0] is ledger:
+        return cached[1]
+    if len(cache) >= LEDGER_DF_CACHE_SIZE:
+        cache.clear()
+    ledger_df = build_ledger_display_df(ledger, include_calc_columns)
+    cache[key] = (ledger, ledger_df)
+    return ledger_df
 
 
 def build_state_detail_rows(snapshot: PaystubSnapshot) -> list[dict[str, str]]:
@@ -1235,31 +837,47 @@ def build_state_detail_rows(snapshot: PaystubSnapshot) -> list[dict[str, str]]:
     return rows
 
 
-def collect_evidence_lines(extracted: dict[str, Any]) -> list[tuple[str, str]]:
-    evidence_lines: list[tuple[str, str]] = []
-    for key in ["gross_pay", "federal_income_tax", "social_security_tax", "medicare_tax", "k401_contrib"]:
+def collect_evidence_lines(extracted: dict[str, Any]) -> Iterator[tuple[str, str]]:
+    for key in EVIDENCE_FIELD_KEYS:
         line = extracted.get(key, {}).get("evidence")
         if line:
-            evidence_lines.append((key, line))
-    for state, row in sorted(extracted.get("state_income_tax", {}).items()):
-        evidence = row.get("evidence")
-        if evidence:
-            evidence_lines.append((f"state_{state}", evidence))
-    return evidence_lines
+            yield key, line
+    yield from (
+        (f"state_{state}", row["evidence"])
+        for state, row in sorted(extracted.get("state_income_tax", {}).items())
+        if row.get("evidence")
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def metric_cards_markup(cards: tuple[tuple[str, str], ...], columns: int) -> str:
+    tiles = "".join(
+        f"<div class='metric-card'><div class='label'>{label}</div><div class='value'>{value}</div></div>"
+        for label, value in cards
+    )
+    return (
+        f"<div class='metric-card-grid' style='grid-template-columns: repeat({columns}, minmax(0, 1fr));'>{tiles}</div>"
+    )
+
 
+def render_metric_cards(cards: tuple[tuple[str, str], ...], columns: int | None = None) -> None:
+    """Render a set of metric cards as one grid element instead of one element per column."""
+    st.html(metric_cards_markup(cards, columns or len(cards)))
 
-def metric_card(label: str, value: str) -> None:
-    st.markdown(
-        f"""
-<div class="metric-card">
-  <div class="label">{label}</div>
-  <div class="value">{value}</div>
-</div>
-        """,
-        unsafe_allow_html=True,
+
+@functools.lru_cache(maxsize=16)
+def state_ytd_cards(state_ytds: tuple[tuple[str, Decimal | None], ...]) -> tuple[tuple[str, str], ...]:
+    """Per-state YTD metric cards, sorted by state."""
+    return tuple(
+        (STATE_TAX_YTD_LABELS.get(state) or f"{state} Tax YTD", format_money(ytd)) for state, ytd in sorted(state_ytds)
     )
 
 
+@functools.lru_cache(maxsize=16)
+def whole_year_summary_heading(filer_id: str, role: str) -> str:
+    return f"### Whole-Year Summary: {filer_id.title()} ({role})"
+
+
 def snapshot_to_dict(snapshot: PaystubSnapshot) -> dict[str, Any]:
     return {
         "file": snapshot.file,
@@ -1300,6 +918,16 @@ def snapshot_to_dict(snapshot: PaystubSnapshot) -> dict[str, Any]:
     }
 
 
+def cached_snapshot_dict(snapshot: PaystubSnapshot) -> dict[str, Any]:
+    """Convert the session's snapshot to a dict once per snapshot object."""
+    cached = st.session_state.get("_snapshot_dict")
+    if cached is not None and cached[0] is snapshot:
+        return cast(dict[str, Any], cached[1])
+    extracted = snapshot_to_dict(snapshot)
+    st.session_state["_snapshot_dict"] = (snapshot, extracted)
+    return extracted
+
+
 def _amount_pair_from_payload(payload: dict[str, Any] | None) -> AmountPair:
     if not isinstance(payload, dict):
         return AmountPair(None, None, None)
@@ -1333,56 +961,78 @@ def snapshot_from_extracted_payload(
     )
 
 
+def is_zero_period_promotable(pair: AmountPair) -> bool:
+    return pair.ytd is None and pair.this_period is not None and pair.this_period > Decimal("0.00")
+
+
+def promote_zero_period_pair(pair: AmountPair) -> AmountPair:
+    if not is_zero_period_promotable(pair):
+        return pair
+    return AmountPair(
+        this_period=None,
+        ytd=pair.this_period,
+        source_line=pair.source_line,
+        is_ytd_confirmed=True,
+    )
+
+
 def apply_zero_period_ui_inference(snapshot: PaystubSnapshot) -> PaystubSnapshot:
     gross_this_period = to_decimal(snapshot.gross_pay.this_period)
     if gross_this_period is None or abs(gross_this_period) > Decimal("0.01"):
         return snapshot
 
-    promoted_fields: list[str] = []
-
-    def promote_pair(field_name: str, pair: AmountPair) -> AmountPair:
-        if pair.ytd is not None or pair.this_period is None or pair.this_period <= Decimal("0.00"):
-            return pair
-        promoted_fields.append(field_name)
-        return AmountPair(
-            this_period=None,
-            ytd=pair.this_period,
-            source_line=pair.source_line,
-            is_ytd_confirmed=True,
+    promoted_fields = [
+        field_name
+        for field_name, pair in (
+            ("federal_income_tax", snapshot.federal_income_tax),
+            ("social_security_tax", snapshot.social_security_tax),
+            ("medicare_tax", snapshot.medicare_tax),
         )
-
-    state_pairs = {
-        state: promote_pair(f"state_income_tax_{state}", pair) for state, pair in snapshot.state_income_tax.items()
-    }
+        if is_zero_period_promotable(pair)
+    ] + [
+        f"state_income_tax_{state}"
+        for state, pair in snapshot.state_income_tax.items()
+        if is_zero_period_promotable(pair)
+    ]
+    if not promoted_fields:
+        return snapshot
 
     normalized = PaystubSnapshot(
         file=snapshot.file,
         pay_date=snapshot.pay_date,
         gross_pay=snapshot.gross_pay,
-        federal_income_tax=promote_pair("federal_income_tax", snapshot.federal_income_tax),
-        social_security_tax=promote_pair("social_security_tax", snapshot.social_security_tax),
-        medicare_tax=promote_pair("medicare_tax", snapshot.medicare_tax),
+        federal_income_tax=promote_zero_period_pair(snapshot.federal_income_tax),
+        social_security_tax=promote_zero_period_pair(snapshot.social_security_tax),
+        medicare_tax=promote_zero_period_pair(snapshot.medicare_tax),
         k401_contrib=snapshot.k401_contrib,
-        state_income_tax=state_pairs,
+        state_income_tax={state: promote_zero_period_pair(pair) for state, pair in snapshot.state_income_tax.items()},
         normalized_lines=list(snapshot.normalized_lines),
         parse_anomalies=list(snapshot.parse_anomalies),
     )
-
-    if promoted_fields:
-        normalized.parse_anomalies.append(
-            {
-                "code": "zero_period_ui_inferred_ytd",
-                "severity": "warning",
-                "message": (
-                    "UI inferred single-value taxes as YTD because gross pay this period is $0.00. "
-                    f"Fields: {', '.join(sorted(promoted_fields))}"
-                ),
-                "evidence": normalized.pay_date or normalized.file,
-            }
-        )
+    normalized.parse_anomalies.append(
+        {
+            "code": "zero_period_ui_inferred_ytd",
+            "severity": "warning",
+            "message": (
+                "UI inferred single-value taxes as YTD because gross pay this period is $0.00. "
+                f"Fields: {', '.join(sorted(promoted_fields))}"
+            ),
+            "evidence": normalized.pay_date or normalized.file,
+        }
+    )
     return normalized
 
 
+@functools.lru_cache(maxsize=1024)
+def normalize_iso_date(value: str) -> str | None:
+    if not ISO_DATE_RE.fullmatch(value):
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        return None
+
+
 def get_filer_pay_date_overrides(filer_id: str) -> dict[str, str]:
     all_overrides = cast(dict[str, dict[str, str]], st.session_state.setdefault("pay_date_overrides", {}))
     return all_overrides.setdefault(filer_id, {})
@@ -1408,7 +1058,7 @@ def render_pay_date_override_editor(
         )
 
     editor_df = st.data_editor(
-        pd.DataFrame(rows),
+        pd.DataFrame(rows, columns=PAY_DATE_EDITOR_COLUMNS),
         use_container_width=True,
         hide_index=True,
         key=f"pay_date_override_editor_{filer_id}_{tax_year}",
@@ -1423,15 +1073,15 @@ def render_pay_date_override_editor(
 
     valid_overrides: dict[str, str] = {}
     invalid_rows: list[str] = []
-    for _, row in editor_df.iterrows():
-        file_name = str(row.get("File", "")).strip()
-        detected_str = str(row.get("Detected Pay Date", "")).strip()
-        assigned = str(row.get("Assigned Pay Date", "")).strip()
-        if not file_name or not assigned or assigned == detected_str:
+    for file_value, detected_value, assigned_value in editor_df[list(PAY_DATE_EDITOR_COLUMNS)].itertuples(
+        index=False, name=None
+    ):
+        file_name = str(file_value).strip()
+        assigned = str(assigned_value).strip()
+        if not file_name or not assigned or assigned == str(detected_value).strip():
             continue
-        try:
-            normalized = date.fromisoformat(assigned).isoformat()
-        except ValueError:
+        normalized = normalize_iso_date(assigned)
+        if normalized is None:
             invalid_rows.append(file_name)
             continue
         valid_overrides[file_name] = normalized
@@ -1446,35 +1096,75 @@ def render_pay_date_override_editor(
     return valid_overrides
 
 
-def build_report_markdown(payload: dict[str, Any]) -> str:
-    lines: list[str] = []
-    lines.append("# Payslip vs W-2 Validation")
-    lines.append("")
-    lines.append(f"- Tax year: {payload['tax_year']}")
-    lines.append(f"- Latest payslip used: `{payload['latest_paystub_file']}`")
-    lines.append(f"- Latest payslip pay date: {payload['latest_pay_date']}")
-    lines.append("")
+def corrections_from_editor(edited_df: pd.DataFrame) -> dict[str, dict[str, Any]]:
+    """Collect the rows of the corrections editor that name a field and carry a numeric value."""
+    fields = edited_df["Field"]
+    values = pd.to_numeric(edited_df["Value"], errors="coerce")
+    keep = fields.notna() & fields.astype(bool) & values.notna()
+    reasons = edited_df["Reason"].where(edited_df["Reason"].notna(), "").astype(str).str.strip()
+    reasons = reasons.mask(reasons == "", "Manual UI Override")
+    return {
+        str(field): {"value": float(value), "audit_reason": reason}
+        for field, value, reason in zip(fields[keep], values[keep], reasons[keep])
+    }
+
+
+def cached_report_markdown(report: dict[str, Any]) -> str:
+    """Render the filing packet markdown once per report object held in session state."""
+    cached = st.session_state.get("_report_markdown")
+    if cached is not None and cached[0] is report:
+        return cast(str, cached[1])
+    markdown = package_to_markdown(report)
+    st.session_state["_report_markdown"] = (report, markdown)
+    return markdown
+
+
+def cached_packet_artifacts(packet: dict[str, Any]) -> tuple[bytes, str, bytes]:
+    """Serialize the filing packet downloads (JSON, Markdown, CSV) once per packet object in session state."""
+    cached = st.session_state.get("_packet_artifacts")
+    if cached is not None and cached[0] is packet:
+        return cast(tuple[bytes, str, bytes], cached[1])
+    artifacts = (
+        dumps_json_pretty(packet),
+        package_to_markdown(packet),
+        ledger_to_csv(packet["ledger"]),
+    )
+    st.session_state["_packet_artifacts"] = (packet, artifacts)
+    return artifacts
+
 
+def build_report_markdown(payload: dict[str, Any]) -> str:
     extracted = payload["extracted"]
-    lines.append("## Extracted YTD Values")
-    lines.append(f"- Gross pay: {extracted['gross_pay']['ytd']}")
-    lines.append(f"- Federal tax: {extracted['federal_income_tax']['ytd']}")
-    lines.append(f"- Social Security tax: {extracted['social_security_tax']['ytd']}")
-    lines.append(f"- Medicare tax: {extracted['medicare_tax']['ytd']}")
-    lines.append(f"- 401(k): {extracted['k401_contrib']['ytd']}")
-    for state, row in sorted(extracted.get("state_income_tax", {}).items()):
-        lines.append(f"- {state} state tax: {row['ytd']}")
+    gross_ytd, federal_ytd, social_security_ytd, medicare_ytd, k401_ytd = (
+        extracted[key]["ytd"]
+        for key in ("gross_pay", "federal_income_tax", "social_security_tax", "medicare_tax", "k401_contrib")
+    )
+    state_lines = "".join(
+        f"- {state} state tax: {row['ytd']}\n" for state, row in sorted(extracted.get("state_income_tax", {}).items())
+    )
+    report = (
+        "# Payslip vs W-2 Validation\n"
+        "\n"
+        f"- Tax year: {payload['tax_year']}\n"
+        f"- Latest payslip used: `{payload['latest_paystub_file']}`\n"
+        f"- Latest payslip pay date: {payload['latest_pay_date']}\n"
+        "\n"
+        "## Extracted YTD Values\n"
+        f"- Gross pay: {gross_ytd}\n"
+        f"- Federal tax: {federal_ytd}\n"
+        f"- Social Security tax: {social_security_ytd}\n"
+        f"- Medicare tax: {medicare_ytd}\n"
+        f"- 401(k): {k401_ytd}\n"
+        f"{state_lines}"
+    )
 
     comparisons = payload.get("comparisons", [])
     if comparisons:
-        lines.append("")
-        lines.append("## Comparisons")
-        for row in comparisons:
-            lines.append(
-                f"- {row['field']}: paystub={row['paystub']} w2={row['w2']} diff={row['difference']} status={row['status']}"
-            )
-
-    return "\n".join(lines) + "\n"
+        report += "\n## Comparisons\n" + "".join(
+            f"- {row['field']}: paystub={row['paystub']} w2={row['w2']} diff={row['difference']} status={row['status']}\n"
+            for row in comparisons
+        )
+    return report
 
 
 def as_number(value: Any, fallback: float = 0.0) -> float:
@@ -1487,10 +1177,8 @@ def as_number(value: Any, fallback: float = 0.0) -> float:
 
 
 def show_notice(message: str, level: str = "success") -> None:
-    st.markdown(
-        f"<div class='notice notice-{level}'>{message}</div>",
-        unsafe_allow_html=True,
-    )
+    """Render an HTML notice; st.html does not parse Markdown, so messages must use HTML markup."""
+    st.html(f"<div class='notice notice-{level}'>{message}</div>")
 
 
 def supports_kwarg(func: Any, kwarg_name: str) -> bool:
@@ -1500,6 +1188,11 @@ def supports_kwarg(func: Any, kwarg_name: str) -> bool:
         return False
 
 
+# Money columns are numeric, so missing amounts are nulls; show them as "—" where st.dataframe supports a
+# placeholder (Streamlit 1.52+), matching the em dash used by the text columns.
+MONEY_TABLE_KWARGS: dict[str, Any] = {"placeholder": "—"} if supports_kwarg(st.dataframe, "placeholder") else {}
+
+
 def state_values_from_w2_data(w2_data: dict[str, Any] | None) -> dict[str, dict[str, float]]:
     result: dict[str, dict[str, float]] = {}
     if not w2_data:
@@ -1515,17 +1208,19 @@ def state_values_from_w2_data(w2_data: dict[str, Any] | None) -> dict[str, dict[
     return result
 
 
+@functools.cache
+def manual_w2_default_values() -> tuple[tuple[str, float], ...]:
+    template = build_w2_template()
+    return tuple((key, as_number(template[field], 0.0)) for key, field in MANUAL_W2_BOX_FIELDS)
+
+
 def ensure_manual_w2_defaults(states_for_form: list[str]) -> None:
-    default = build_w2_template()
-    st.session_state.setdefault("box1", as_number(default["box_1_wages_tips_other_comp"], 0.0))
-    st.session_state.setdefault("box2", as_number(default["box_2_federal_income_tax_withheld"], 0.0))
-    st.session_state.setdefault("box3", as_number(default["box_3_social_security_wages"], 0.0))
-    st.session_state.setdefault("box4", as_number(default["box_4_social_security_tax_withheld"], 0.0))
-    st.session_state.setdefault("box5", as_number(default["box_5_medicare_wages_and_tips"], 0.0))
-    st.session_state.setdefault("box6", as_number(default["box_6_medicare_tax_withheld"], 0.0))
+    session = st.session_state
+    for key, default in manual_w2_default_values():
+        session.setdefault(key, default)
     for state in states_for_form:
-        st.session_state.setdefault(f"box16_{state}", 0.0)
-        st.session_state.setdefault(f"box17_{state}", 0.0)
+        session.setdefault(f"box16_{state}", 0.0)
+        session.setdefault(f"box17_{state}", 0.0)
 
 
 def sync_manual_w2_from_upload(
@@ -1533,9 +1228,7 @@ def sync_manual_w2_from_upload(
     states_from_snapshot: list[str],
     source_tag: str | None,
 ) -> None:
-    if not uploaded_w2_data or source_tag is None:
-        return
-    if st.session_state.get("manual_w2_prefill_source") == source_tag:
+    if source_tag is None or st.session_state.get("manual_w2_prefill_source") == source_tag or not uploaded_w2_data:
         return
 
     uploaded_states = state_values_from_w2_data(uploaded_w2_data)
@@ -1546,24 +1239,9 @@ def sync_manual_w2_from_upload(
     ensure_manual_w2_defaults(form_states)
     autofilled_fields: set[str] = set()
 
-    st.session_state["box1"] = as_number(uploaded_w2_data.get("box_1_wages_tips_other_comp"), st.session_state["box1"])
-    autofilled_fields.add("box1")
-    st.session_state["box2"] = as_number(
-        uploaded_w2_data.get("box_2_federal_income_tax_withheld"), st.session_state["box2"]
-    )
-    autofilled_fields.add("box2")
-    st.session_state["box3"] = as_number(uploaded_w2_data.get("box_3_social_security_wages"), st.session_state["box3"])
-    autofilled_fields.add("box3")
-    st.session_state["box4"] = as_number(
-        uploaded_w2_data.get("box_4_social_security_tax_withheld"), st.session_state["box4"]
-    )
-    autofilled_fields.add("box4")
-    st.session_state["box5"] = as_number(
-        uploaded_w2_data.get("box_5_medicare_wages_and_tips"), st.session_state["box5"]
-    )
-    autofilled_fields.add("box5")
-    st.session_state["box6"] = as_number(uploaded_w2_data.get("box_6_medicare_tax_withheld"), st.session_state["box6"])
-    autofilled_fields.add("box6")
+    session = st.session_state
+    session.update({key: as_number(uploaded_w2_data.get(field), session[key]) for key, field in MANUAL_W2_BOX_FIELDS})
+    autofilled_fields.update(key for key, _ in MANUAL_W2_BOX_FIELDS)
 
     for state in form_states:
         state_row = uploaded_states.get(state)
@@ -1577,12 +1255,15 @@ def sync_manual_w2_from_upload(
     st.session_state["_w2_autofilled_fields"] = sorted(autofilled_fields)
 
 
+@functools.lru_cache(maxsize=64)
+def merge_manual_w2_states(snapshot_states: tuple[str, ...], prior_states: tuple[str, ...]) -> tuple[str, ...]:
+    return tuple(sorted(set(snapshot_states).union(prior_states)))
+
+
 def build_manual_w2(snapshot: PaystubSnapshot, tax_year: int) -> dict[str, Any]:
-    states_from_snapshot = sorted(snapshot.state_income_tax.keys()) or ["VA"]
-    prior_states = st.session_state.get("manual_w2_states", [])
-    states_for_form = sorted(set(states_from_snapshot) | set(prior_states))
-    if not states_for_form:
-        states_for_form = ["VA"]
+    states_from_snapshot = tuple(snapshot.state_income_tax) or ("VA",)
+    prior_states = tuple(st.session_state.get("manual_w2_states", ()))
+    states_for_form = list(merge_manual_w2_states(states_from_snapshot, prior_states))
     st.session_state["manual_w2_states"] = states_for_form
     ensure_manual_w2_defaults(states_for_form)
     autofilled = set(cast(list[str], st.session_state.get("_w2_autofilled_fields", [])))
@@ -1670,18 +1351,16 @@ def build_manual_w2(snapshot: PaystubSnapshot, tax_year: int) -> dict[str, Any]:
 
 
 def status_pill(status: str) -> str:
-    if status == "match":
-        klass = "status-match"
-    elif status == "mismatch":
-        klass = "status-mismatch"
-    elif status == "review_needed":
-        klass = "status-review"
-    else:
-        klass = "status-missing"
-    return f"<span class='status-pill {klass}'>{status}</span>"
+    pill = STATUS_PILLS.get(status)
+    if pill is None:
+        pill = f"<span class='status-pill status-missing'>{status}</span>"
+    return pill
 
 
 def step_state_class(step_state: str) -> str:
+    known = STEP_STATE_CLASSES.get(step_state)
+    if known is not None:
+        return known
     normalized = step_state.lower().replace(" ", "-")
     return f"state-{normalized}"
 
@@ -1694,21 +1373,14 @@ def render_workflow_steps(steps: list[dict[str, Any]]) -> None:
         state_class = step_state_class(state)
         title = str(step.get("title", ""))
         cards.append(
-            "<div class='workflow-step"
-            + active_class
-            + "'><div class='step-title'>"
-            + title
-            + "</div><span class='step-state "
-            + state_class
-            + "'>"
-            + state
-            + "</span></div>"
+            f"<div class='workflow-step{active_class}'><div class='step-title'>{title}</div>"
+            f"<span class='step-state {state_class}'>{state}</span></div>"
         )
-    st.markdown("<div class='workflow-steps'>" + "".join(cards) + "</div>", unsafe_allow_html=True)
+    st.html(f"<div class='workflow-steps'>{''.join(cards)}</div>")
 
 
 def render_step_heading(step_number: int, title: str, subtitle: str) -> None:
-    st.markdown(
+    st.html(
         f"""
         <div class="step-heading">
             <div class="step-chip">Step {step_number}</div>
@@ -1718,10 +1390,18 @@ def render_step_heading(step_number: int, title: str, subtitle: str) -> None:
             </div>
         </div>
         """,
-        unsafe_allow_html=True,
     )
 
 
+def select_filer_analysis(filers_analysis: list[dict[str, Any]], filer_id: str) -> dict[str, Any] | None:
+    """Return the analysis for filer_id, falling back to the first filer."""
+    for analysis in filers_analysis:
+        public = analysis.get("public")
+        if public is not None and public.get("id") == filer_id:
+            return analysis
+    return filers_analysis[0] if filers_analysis else None
+
+
 def resolve_household_path(path_value: str, base_dir: Path) -> Path:
     """Resolve a filer source path relative to the household config base directory."""
     raw_path = Path(path_value).expanduser()
@@ -1730,19 +1410,32 @@ def resolve_household_path(path_value: str, base_dir: Path) -> Path:
     return (base_dir / raw_path).resolve()
 
 
-def first_existing_path(candidates: list[str], base_dir: Path) -> str:
+def first_existing_path(candidates: list[str], present_names: set[str]) -> str:
+    """Return the first candidate whose file name is in present_names, else the first candidate.
+
+    Names match case-insensitively, as Path.exists() does on macOS and Windows; a case-only match is
+    returned with the on-disk spelling so it also resolves on case-sensitive filesystems.
+    """
+    folded_names = {name.casefold(): name for name in present_names}
     for candidate in candidates:
         if not candidate:
             continue
-        resolved = resolve_household_path(candidate, base_dir)
-        if resolved.exists():
+        name = Path(candidate).name
+        if name in present_names:
             return candidate
+        on_disk = folded_names.get(name.casefold())
+        if on_disk is not None:
+            return candidate[: len(candidate) - len(name)] + on_disk
     return candidates[0] if candidates else ""
 
 
+@st.cache_data(ttl=60, show_spinner=False)
 def discover_default_w2_path(filer_id: str, tax_year: int, base_dir: Path) -> str:
     w2_dir = resolve_household_path("w2_forms", base_dir)
-    if not w2_dir.exists():
+    try:
+        with os.scandir(w2_dir) as entries:
+            present_names = {entry.name for entry in entries}
+    except OSError:
         return ""
 
     filer = filer_id.lower().strip()
@@ -1752,7 +1445,7 @@ def discover_default_w2_path(filer_id: str, tax_year: int, base_dir: Path) -> st
             f"w2_forms/W2_{tax_year}_Spouse.pdf",
             f"w2_forms/w2_{tax_year}_spouse.json",
         ]
-        return first_existing_path(candidates, base_dir)
+        return first_existing_path(candidates, present_names)
 
     candidates = [
         f"w2_forms/W2_{tax_year}_Sasie_Redacted.pdf",
@@ -1761,7 +1454,47 @@ def discover_default_w2_path(filer_id: str, tax_year: int, base_dir: Path) -> st
         f"w2_forms/w2_{tax_year}.json",
         f"w2_forms/w2_{tax_year}_primary.json",
     ]
-    return first_existing_path(candidates, base_dir)
+    return first_existing_path(candidates, present_names)
+
+
+@functools.lru_cache(maxsize=4096)
+def anomaly_issue_id(code: str, message: str) -> str:
+    return f"{code}_{hashlib.md5(message.encode()).hexdigest()[:8]}"
+
+
+@functools.lru_cache(maxsize=256)
+def first_unresolved_critical_code(
+    critical_issues: tuple[tuple[str, str], ...], reviewed_ids: frozenset[str]
+) -> str | None:
+    for code, message in critical_issues:
+        if anomaly_issue_id(code, message) not in reviewed_ids:
+            return code
+    return None
+
+
+def anomaly_card_markup(severity: str, code: Any, message: Any, filer_id: str, issue_id: str, number: int) -> str:
+    bg_color = "#fff5f5" if severity == "critical" else "#fffbeb"
+    border_color = "#feb2b2" if severity == "critical" else "#fef3c7"
+    icon = "🚨" if severity == "critical" else "⚠️"
+    label = "CRITICAL" if severity == "critical" else "WARNING"
+    return f"""
+            <a id="issue-{issue_id}"></a>
+            <div style="background-color: {bg_color}; border: 1px solid {border_color}; padding: 0.8rem; border-radius: 6px; margin-bottom: 0.5rem;">
+                <div style="display: flex; justify-content: space-between; align-items: center;">
+                    <strong>#{number} {icon} {label}: {code}</strong>
+                    <span style="font-size: 0.8rem; color: #666;">{filer_id}</span>
+                </div>
+                <div style="font-size: 0.9rem; margin-top: 0.3rem;">{message}</div>
+            </div>
+            """
+
+
+def anomaly_review_label(number: int, code: Any, message: Any, max_chars: int = 60) -> str:
+    """Checkbox label naming the card it belongs to, since all checkboxes render after the cards."""
+    snippet = " ".join(str(message).split())
+    if len(snippet) > max_chars:
+        snippet = snippet[: max_chars - 1].rstrip() + "…"
+    return f"Mark #{number} as reviewed ({code}): {snippet}" if snippet else f"Mark #{number} as reviewed ({code})"
 
 
 def render_anomaly_audit(issues: list[dict[str, Any]], filer_id: str) -> None:
@@ -1774,58 +1507,48 @@ def render_anomaly_audit(issues: list[dict[str, Any]], filer_id: str) -> None:
     st.caption("Review the following anomalies detected across your payroll history.")
 
     # Initialize reviewed state if missing
-    if "reviewed_anomalies" not in st.session_state:
-        st.session_state["reviewed_anomalies"] = {}
-    if filer_id not in st.session_state["reviewed_anomalies"]:
-        st.session_state["reviewed_anomalies"][filer_id] = set()
+    reviewed_for_filer: set[str] = st.session_state.setdefault("reviewed_anomalies", {}).setdefault(filer_id, set())
 
-    # Sort: Critical first, then Warning
-    issues = sorted(issues, key=lambda x: 0 if x.get("severity") == "critical" else 1)
+    # Critical first, then Warning; a stable partition keeps each group's order.
+    critical_issues: list[dict[str, Any]] = []
+    other_issues: list[dict[str, Any]] = []
+    for issue in issues:
+        (critical_issues if issue.get("severity") == "critical" else other_issues).append(issue)
+    issues = critical_issues + other_issues
 
+    pending: list[tuple[int, str, str]] = []
+    cards: list[str] = []
     for i, issue in enumerate(issues):
-        severity = issue.get("severity", "warning").lower()
         code = issue.get("code", "unknown")
         message = issue.get("message", "")
-        issue_id = f"{code}_{hashlib.md5(message.encode()).hexdigest()[:8]}"
-
-        is_reviewed = issue_id in st.session_state["reviewed_anomalies"][filer_id]
+        issue_id = anomaly_issue_id(str(code), str(message))
 
         # Hide from UI if reviewed
-        if is_reviewed:
+        if issue_id in reviewed_for_filer:
             continue
 
-        bg_color = "#fff5f5" if severity == "critical" else "#fffbeb"
-        border_color = "#feb2b2" if severity == "critical" else "#fef3c7"
-        icon = "🚨" if severity == "critical" else "⚠️"
-        label = "CRITICAL" if severity == "critical" else "WARNING"
+        severity = issue.get("severity", "warning").lower()
+        number = len(pending) + 1
+        pending.append((i, issue_id, anomaly_review_label(number, code, message)))
+        cards.append(anomaly_card_markup(severity, code, message, filer_id, issue_id, number))
 
-        st.markdown(
-            f"""
-            <div style="background-color: {bg_color}; border: 1px solid {border_color}; padding: 0.8rem; border-radius: 6px; margin-bottom: 0.5rem;">
-                <div style="display: flex; justify-content: space-between; align-items: center;">
-                    <strong>{icon} {label}: {code}</strong>
-                    <span style="font-size: 0.8rem; color: #666;">{filer_id}</span>
-                </div>
-                <div style="font-size: 0.9rem; margin-top: 0.3rem;">{message}</div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
+    # One HTML element carries every card; the review checkboxes follow it.
+    if cards:
+        st.html("".join(cards))
 
+    for i, issue_id, review_label in pending:
         col1, _ = st.columns([1, 2])
         with col1:
             if st.checkbox(
-                "Acknowledge / Mark as Reviewed",
-                value=is_reviewed,
+                review_label,
+                value=False,
                 key=f"review_{filer_id}_{issue_id}_{i}",
             ):
-                st.session_state["reviewed_anomalies"][filer_id].add(issue_id)
+                reviewed_for_filer.add(issue_id)
                 st.rerun()  # Refresh to hide immediately
-            else:
-                st.session_state["reviewed_anomalies"][filer_id].discard(issue_id)
 
     # Summary of reviewed items
-    reviewed_count = len(st.session_state["reviewed_anomalies"][filer_id])
+    reviewed_count = len(reviewed_for_filer)
     if reviewed_count > 0:
         if reviewed_count == len(issues):
             st.success(f"✅ All {len(issues)} anomalies have been reviewed.")
@@ -1833,72 +1556,47 @@ def render_anomaly_audit(issues: list[dict[str, Any]], filer_id: str) -> None:
             st.info(f"💡 {reviewed_count} issue(s) reviewed and hidden.")
 
         if st.button("Unhide All Reviewed Anomalies", key=f"unhide_{filer_id}"):
-            st.session_state["reviewed_anomalies"][filer_id] = set()
+            reviewed_for_filer.clear()
             st.rerun()
 
 
 def render_auto_heal_panel(issues: list[dict[str, Any]]) -> None:
-    auto_heal_codes = {
-        "zero_period_ytd_promoted",
-        "state_ytd_underflow_corrected",
-        "state_ytd_outlier_corrected",
-        "gross_ytd_repaired",
-        "gross_this_period_repaired",
-        "implausible_amount_filtered",
-    }
-    healed_rows = [issue for issue in issues if str(issue.get("code")) in auto_heal_codes]
+    healed_rows = [issue for issue in issues if str(issue.get("code")) in AUTO_HEAL_CODES]
     if not healed_rows:
         return
 
     st.markdown("#### Auto-heal applied")
     st.caption("These parser/continuity adjustments were applied automatically and are tracked in the filing audit.")
-    display_rows: list[dict[str, Any]] = []
-    for issue in healed_rows:
-        display_rows.append(
-            {
-                "Code": issue.get("code"),
-                "Field": issue.get("field_name") or "—",
-                "Old Interpretation": issue.get("old_interpretation") or "—",
-                "New Interpretation": issue.get("new_interpretation") or "—",
-                "Reason": issue.get("reason") or issue.get("message") or "—",
-                "Evidence": issue.get("evidence") or "—",
-            }
-        )
-    st.dataframe(pd.DataFrame(display_rows), use_container_width=True, hide_index=True)
+    display_df = pd.DataFrame.from_records(
+        (
+            (
+                issue.get("code"),
+                issue.get("field_name") or "—",
+                issue.get("old_interpretation") or "—",
+                issue.get("new_interpretation") or "—",
+                issue.get("reason") or issue.get("message") or "—",
+                issue.get("evidence") or "—",
+            )
+            for issue in healed_rows
+        ),
+        columns=AUTO_HEAL_COLUMNS,
+    )
+    st.dataframe(display_df, use_container_width=True, hide_index=True)
+
 
+def packet_signature(packet: dict[str, Any]) -> str:
+    """Fingerprint a filing packet's content for change detection (identity only, not a security check)."""
+    return hashlib.blake2b(dumps_json_canonical(packet), digest_size=16).hexdigest()
 
-def ledger_to_csv(ledger: list[dict[str, Any]]) -> str:
+
+def ledger_to_csv(ledger: list[dict[str, Any]]) -> bytes:
     if not ledger:
-        return ""
+        return b""
     buffer = io.StringIO()
-    fieldnames = [
-        "pay_date",
-        "file",
-        "gross_pay_this_period",
-        "gross_pay_ytd",
-        "federal_tax_this_period",
-        "federal_tax_ytd",
-        "social_security_tax_this_period",
-        "social_security_tax_ytd",
-        "medicare_tax_this_period",
-        "medicare_tax_ytd",
-        "state_tax_this_period_total",
-        "state_tax_ytd_total",
-        "state_tax_this_period_by_state",
-        "state_tax_ytd_by_state",
-        "ytd_verification",
-    ]
-    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
-    writer.writeheader()
-    for row in ledger:
-        csv_row = dict(row)
-        csv_row["state_tax_this_period_by_state"] = json.dumps(
-            csv_row["state_tax_this_period_by_state"], sort_keys=True
-        )
-        csv_row["state_tax_ytd_by_state"] = json.dumps(csv_row["state_tax_ytd_by_state"], sort_keys=True)
-        writer.writerow(csv_row)
-        writer.writerow(csv_row)
-    return buffer.getvalue()
+    writer = csv.writer(buffer)
+    writer.writerow(LEDGER_CSV_FIELDNAMES)
+    writer.writerows(ledger_csv_rows(ledger))
+    return buffer.getvalue().encode()
 
 
 def render_setup_wizard() -> None:
@@ -1914,59 +1612,7 @@ def render_setup_wizard() -> None:
             with col1:
                 tax_year = st.number_input("Tax Year", min_value=2000, max_value=2100, value=2025)
             with col2:
-                states = [
-                    "AL",
-                    "AK",
-                    "AZ",
-                    "AR",
-                    "CA",
-                    "CO",
-                    "CT",
-                    "DE",
-                    "FL",
-                    "GA",
-                    "HI",
-                    "ID",
-                    "IL",
-                    "IN",
-                    "IA",
-                    "KS",
-                    "KY",
-                    "LA",
-                    "ME",
-                    "MD",
-                    "MA",
-                    "MI",
-                    "MN",
-                    "MS",
-                    "MO",
-                    "MT",
-                    "NE",
-                    "NV",
-                    "NH",
-                    "NJ",
-                    "NM",
-                    "NY",
-                    "NC",
-                    "ND",
-                    "OH",
-                    "OK",
-                    "OR",
-                    "PA",
-                    "RI",
-                    "SC",
-                    "SD",
-                    "TN",
-                    "TX",
-                    "UT",
-                    "VT",
-                    "VA",
-                    "WA",
-                    "WV",
-                    "WI",
-                    "WY",
-                ]
-                state = st.selectbox("State", states, index=4)  # Default CA
+                state = st.selectbox("State", STATE_CODES, index=STATE_CODES.index("CA"))
             with col3:
                 filing_status = st.selectbox(
                     "Filing Status", ["SINGLE", "MARRIED_JOINTLY", "MARRIED_SEPARATELY", "HEAD_OF_HOUSEHOLD", "WIDOWED"]
@@ -2015,8 +1661,6 @@ def render_setup_wizard() -> None:
                         spouse_sources["w2_files"] = [spouse_w2_path.strip()]
                     config["filers"].append({"id": "spouse", "role": "SPOUSE", "sources": spouse_sources})
 
-                from paystub_analyzer.utils.contracts import validate_output
-
                 try:
                     validate_output(config, "household_config")
                     st.session_state["household_config"] = config
@@ -2029,12 +1673,8 @@ def render_setup_wizard() -> None:
     with tab2:
         uploaded_file = st.file_uploader("Upload household_config.json", type=["json"])
         if uploaded_file is not None:
-            import json
-            from paystub_analyzer.utils.migration import migrate_household_config
-            from paystub_analyzer.utils.contracts import validate_output
-
             try:
-                cfg = migrate_household_config(json.load(uploaded_file))
+                cfg = migrate_household_config(loads_json_bytes(uploaded_file.getvalue()))
                 validate_output(cfg, "household_config")
                 st.success("Valid configuration loaded!")
 
@@ -2047,7 +1687,253 @@ def render_setup_wizard() -> None:
                 st.error(f"Invalid configuration file: {e}")
 
 
+def raise_gc_young_threshold() -> None:
+    # A rerun allocates many short-lived, acyclic frames/dicts, so collect the youngest generation less often.
+    # This is a process-wide setting that is only ever raised, so concurrent sessions cannot undo each other.
+    gen0, gen1, gen2 = gc.get_threshold()
+    if 0 < gen0 < GC_GEN0_THRESHOLD:
+        gc.set_threshold(GC_GEN0_THRESHOLD, gen1, gen2)
+
+
 def main() -> None:
+    raise_gc_young_threshold()
+    render_app()
+
+
+def consistency_issues_markdown(issues: list[dict[str, Any]]) -> str:
+    """Render consistency issues as one Markdown bullet list so each section ships a single element."""
+    return "\n".join(
+        f"- {'[CRITICAL]' if issue.get('severity') == 'critical' else '[WARNING]'} "
+        f"`{issue.get('code')}`: {issue.get('message')}"
+        for issue in issues
+    )
+
+
+@st.fragment
+def render_filing_packet_step(
+    household_config: dict[str, Any],
+    config_base_dir: Path,
+    year: int,
+    render_scale: float,
+    tolerance: Decimal,
+    active_step: int,
+) -> None:
+    """Render Step 3 as a fragment so its widgets and downloads rerun only this section."""
+    prior_w2_validation = st.session_state.get("w2_validation")
+    prior_packet = st.session_state.get("annual_packet")
+
+    st.markdown("---")
+    render_step_heading(
+        3,
+        "Filing Packet",
+        "Generate annual ledger artifacts, run filing checks, and produce exportable validation outputs.",
+    )
+
+    include_w2 = st.checkbox(
+        "Include W-2 comparison in annual packet",
+        value=True,
+        help="Disable this to build the packet from paystubs only.",
+    )
+    if include_w2:
+        st.caption("Checkbox ON: annual packet includes W-2 match/mismatch checks and influences Ready To File.")
+    else:
+        st.caption("Checkbox OFF: annual packet is paystub-only (no W-2 comparison), useful for extraction QA.")
+    can_build_packet = prior_w2_validation is not None
+
+    build_button_type: ButtonKind = "primary" if active_step == 3 else "secondary"
+    build_col, info_col = st.columns([0.86, 0.14], gap="small")
+    with build_col:
+        build_packet_clicked = st.button(
+            "Build Filing Packet",
+            type=build_button_type,
+            disabled=not can_build_packet,
+        )
+    with info_col:
+        with st.popover("i", use_container_width=False):
+            st.markdown("**Build Filing Packet details**")
+            st.markdown(
+                "- Processes all payslips for the selected tax year.\n"
+                "- Applies YTD verification checks and consistency rules.\n"
+                "- Generates downloadable JSON, Markdown, and CSV artifacts.\n"
+                "- Includes W-2 checks when the checkbox is enabled."
+            )
+
+    if build_packet_clicked:
+        # household_config is st.session_state["household_config"] (the SSOT), passed in by render_app.
+        household_cfg = household_config
+
+        def packet_snapshot_loader(source_cfg: dict[str, Any]) -> list[PaystubSnapshot]:
+            p_dir = resolve_household_path(str(source_cfg["paystubs_dir"]), config_base_dir)
+            return collect_annual_snapshots(
+                paystubs_dir=p_dir,
+                year=int(year),
+                render_scale=render_scale,
+                psm=6,
+            )
+
+        # build_household_package hands each filer's own sources dict to the loaders, so identity is enough.
+        filer_id_by_sources = {id(f["sources"]): f["id"] for f in household_cfg["filers"]}
+
+        def packet_w2_loader(source_cfg: dict[str, Any]) -> dict[str, Any] | None:
+            # If this is the active filer AND we have a W-2 session state for them, use it
+            f_id = filer_id_by_sources.get(id(source_cfg))
+            if f_id == st.session_state.get("active_filer_id"):
+                w2_val = prior_w2_validation
+                if w2_val:
+                    return cast(dict[str, Any], w2_val.get("w2_input"))
+
+            # Fallback to config-defined w2_files if present
+            w2_files = source_cfg.get("w2_files", [])
+            if w2_files:
+                return get_cached_config_w2_payload(
+                    file_paths=tuple(str(path) for path in w2_files),
+                    base_dir_str=str(config_base_dir),
+                    tax_year=int(year),
+                    render_scale=render_scale,
+                )
+            return None
+
+        corrections_payload: dict[str, Any] = st.session_state.get("corrections", {})
+        packet_pay_date_overrides: dict[str, dict[str, str]] = st.session_state.get("pay_date_overrides", {})
+
+        packet = build_household_package(
+            household_config=household_cfg,
+            tax_year=int(year),
+            snapshot_loader=packet_snapshot_loader,
+            w2_loader=packet_w2_loader,
+            tolerance=tolerance,
+            corrections=corrections_payload,
+            pay_date_overrides=packet_pay_date_overrides,
+        )
+        # An identical rebuild keeps the current packet object (and every cache keyed on it) and skips the rerun.
+        packet_sig = packet_signature(packet)
+        if prior_packet is None or st.session_state.get("_packet_sig") != packet_sig:
+            st.session_state["annual_packet"] = packet
+            st.session_state["_packet_sig"] = packet_sig
+            st.rerun()
+
+    packet_data = prior_packet
+    current_packet = None
+    if packet_data:
+        current_packet = cast(dict[str, Any], packet_data)
+
+    if current_packet:
+        # If it's a household report (contains 'report' key from build_household_package)
+        report = current_packet.get("report", current_packet)
+        summary = report.get("household_summary", {})
+        metadata = report.get("metadata", {})
+        filers = report.get("filers", [])
+
+        p1, p2, p3, p4 = st.columns(4)
+        if summary:
+            # Household aggregate metrics
+            p1.metric("Total Gross Pay", format_money(Decimal(summary.get("total_gross_pay_cents", 0)) / 100))
+            p2.metric("Total Fed Tax", format_money(Decimal(summary.get("total_fed_tax_cents", 0)) / 100))
+            p3.metric("Ready To File", str(summary.get("ready_to_file", False)))
+
+            severity_counts: Counter[str] = Counter(
+                issue.get("severity") for f in filers for issue in f.get("consistency_issues", [])
+            )
+
+            critical_count = severity_counts["critical"]
+            p4.metric("Total Critical Issues", critical_count, help=f"{severity_counts['warning']} warning(s)")
+
+            st.caption(
+                f"Household: {metadata.get('state', 'Unknown')} | "
+                f"Filing Status: {metadata.get('filing_status', 'Unknown')} | "
+                f"Year: {metadata.get('filing_year', 'Unknown')}"
+            )
+        else:
+            # Legacy single-filer fallback metrics
+            p1.metric("Paystubs (Canonical)", current_packet.get("paystub_count_canonical", 0))
+            p2.metric("Authenticity Score", current_packet.get("authenticity_assessment", {}).get("score", 0))
+            p3.metric("Ready To File", str(current_packet.get("ready_to_file", False)))
+            severity_counts = Counter(issue.get("severity") for issue in current_packet.get("consistency_issues", []))
+            critical_count = severity_counts["critical"]
+            p4.metric("Critical Issues", critical_count, help=f"{severity_counts['warning']} warning(s)")
+            st.caption(f"Raw paystub files analyzed: {current_packet.get('paystub_count_raw', 0)}")
+
+        blockers: list[str] = []
+        if summary:
+            if not summary.get("ready_to_file"):
+                blockers.append("Household package is not ready to file.")
+        else:
+            if critical_count > 0:
+                blockers.append(f"{critical_count} critical consistency issue(s) must be resolved.")
+            if not bool(current_packet.get("ready_to_file")):
+                blockers.append("Packet is currently marked not ready to file.")
+
+        # Unified decision UI
+        st.markdown("#### Filing Decision")
+        if blockers:
+            st.error("Step 3 decision: NOT READY TO FILE")
+            st.markdown("\n".join(f"- {blocker}" for blocker in blockers))
+        else:
+            st.success("Step 3 decision: READY TO FILE")
+
+        if summary:
+            st.markdown("#### Multi-Filer Consistency Summary")
+            for f in filers:
+                fid = f"{f['id']} ({f['role']})"
+                f_issues = f.get("consistency_issues", [])
+                if not f_issues:
+                    st.write(f"✅ **{fid}**: No issues detected.")
+                else:
+                    st.write(f"⚠️ **{fid}**: {len(f_issues)} issue(s)")
+                    st.markdown(consistency_issues_markdown(f_issues))
+        else:
+            st.markdown("#### Consistency Issues")
+            issues = current_packet.get("consistency_issues", [])
+            if not issues:
+                st.success("No consistency issues detected.")
+            else:
+                st.markdown(consistency_issues_markdown(issues))
+
+        st.markdown("#### Filing Checklist")
+        st.markdown("\n".join(f"- **{item['item']}**: {item['detail']}" for item in current_packet["filing_checklist"]))
+
+        st.markdown("#### Annual Ledger")
+        packet_ledger_df = cached_ledger_display_df(cast(list[dict[str, Any]], current_packet["ledger"]))
+        packet_ytd_flag_mask = flagged_row_mask(packet_ledger_df, "YTD Verification")
+        st.dataframe(
+            cached_flagged_styler(packet_ledger_df, "YTD Verification", flag_mask=packet_ytd_flag_mask),
+            column_config=LEDGER_COLUMN_CONFIG,
+            **MONEY_TABLE_KWARGS,
+            use_container_width=True,
+            hide_index=True,
+        )
+        if packet_ytd_flag_mask.any():
+            st.warning("YTD verification flags were found in this filing packet. Check the rows below before filing.")
+            st.dataframe(
+                packet_ledger_df[packet_ytd_flag_mask],
+                column_config=LEDGER_COLUMN_CONFIG,
+                **MONEY_TABLE_KWARGS,
+                use_container_width=True,
+                hide_index=True,
+            )
+
+        packet_json, packet_md, packet_csv = cached_packet_artifacts(current_packet)
+        st.download_button(
+            "Download Filing Packet (JSON)",
+            data=packet_json,
+            file_name=f"tax_filing_package_{int(year)}.json",
+            mime="application/json",
+        )
+        st.download_button(
+            "Download Filing Packet (Markdown)",
+            data=packet_md,
+            file_name=f"tax_filing_package_{int(year)}.md",
+            mime="text/markdown",
+        )
+        st.download_button(
+            "Download Annual Ledger (CSV)",
+            data=packet_csv,
+            file_name=f"paystub_ledger_{int(year)}.csv",
+            mime="text/csv",
+        )
+
+
+def render_app() -> None:
     st.set_page_config(page_title="Paystub Truth Check", page_icon="📄", layout="wide")
     reset_session_if_schema_changed()
     apply_theme()
@@ -2072,7 +1958,14 @@ def main() -> None:
 
     with st.sidebar:
         st.header("Run Settings")
-        render_scale = st.slider("OCR render scale", min_value=2.0, max_value=4.0, value=2.8, step=0.1)
+        render_scale = st.slider(
+            "OCR render scale",
+            min_value=2.0,
+            max_value=4.0,
+            value=2.8,
+            step=0.1,
+            help=f"W-2 OCR always uses at least {W2_MIN_RENDER_SCALE:.1f}.",
+        )
         tolerance = Decimal(str(st.number_input("Comparison tolerance", min_value=0.0, value=0.01, step=0.01)))
 
         filers_list = [f["id"] for f in household_config["filers"]]
@@ -2084,21 +1977,8 @@ def main() -> None:
         st.divider()
         if st.button("Edit Household Setup", type="secondary"):
             st.session_state["setup_valid"] = False
-            clear_workflow_state()
             # Strict UI namespace isolation on wizard edit
-            for key in list(st.session_state.keys()):
-                if isinstance(key, str) and (
-                    key.startswith("filer_")
-                    or key
-                    in [
-                        "snapshot",
-                        "w2_validation",
-                        "annual_packet",
-                        "household_package",
-                        "corrections",
-                    ]
-                ):
-                    del st.session_state[key]
+            clear_workflow_state(HOUSEHOLD_EDIT_STATE_KEYS, HOUSEHOLD_EDIT_STATE_KEY_PREFIXES)
             st.rerun()
 
     active_filer_id = st.session_state["active_filer_id"]
@@ -2106,12 +1986,13 @@ def main() -> None:
     paystubs_dir_str = active_filer_cfg["sources"]["paystubs_dir"] if active_filer_cfg else "pay_statements"
     paystubs_dir = resolve_household_path(paystubs_dir_str, config_base_dir)
 
-    files = list_paystub_files(paystubs_dir, int(year))
+    files = get_cached_paystub_files(str(paystubs_dir), int(year), directory_mtime_ns(paystubs_dir))
     if not files:
         st.error(f"No PDFs found in `{paystubs_dir}` for year `{year}`.")
         return
 
     latest_file, latest_date = select_latest_paystub(files)
+    # Every write to these keys below ends in st.rerun(), so the reads stay valid for the rest of this run.
     prior_snapshot = st.session_state.get("snapshot")
     prior_w2_validation = st.session_state.get("w2_validation")
     prior_packet = st.session_state.get("annual_packet")
@@ -2121,7 +2002,7 @@ def main() -> None:
     step3_complete = prior_packet is not None
 
     step2_needs_review = False
-    unresolved_critical_codes: list[str] = []
+    unresolved_critical_codes: set[str] = set()
     active_filer_consistency_issues: list[dict[str, Any]] = []
 
     # 1. Check for W-2 comparison mismatches
@@ -2139,16 +2020,17 @@ def main() -> None:
             f_issues = filer["internal"]["meta"].get("consistency_issues", [])
             if f_id == active_filer_id:
                 active_filer_consistency_issues = cast(list[dict[str, Any]], f_issues)
-            f_reviewed = reviewed.get(f_id, set())
-            for issue in f_issues:
-                if issue.get("severity") == "critical":
-                    message = issue.get("message", "")
-                    code = issue.get("code", "unknown")
-                    issue_id = f"{code}_{hashlib.md5(message.encode()).hexdigest()[:8]}"
-                    if issue_id not in f_reviewed:
-                        unresolved_critical_codes.append(str(code))
-                        step2_needs_review = True
-                        break
+            critical_issues = tuple(
+                (str(issue.get("code", "unknown")), str(issue.get("message", "")))
+                for issue in f_issues
+                if issue.get("severity") == "critical"
+            )
+            if not critical_issues:
+                continue
+            unresolved_code = first_unresolved_critical_code(critical_issues, frozenset(reviewed.get(f_id, ())))
+            if unresolved_code is not None:
+                unresolved_critical_codes.add(unresolved_code)
+                step2_needs_review = True
 
     step2_marked_completed = step2_complete and not step2_needs_review
 
@@ -2271,6 +2153,7 @@ def main() -> None:
             try:
                 with st.spinner("Running OCR extraction and consistency checks..."):
                     if analysis_scope == "All payslips in year":
+                        snapshot_resolved = False
                         # v0.3.0 Household Analysis
                         if household_mode and household_config:
                             # Define loaders for household orchestrator
@@ -2308,13 +2191,12 @@ def main() -> None:
                             if supports_kwarg(build_household_package, "corrections"):
                                 household_kwargs["corrections"] = st.session_state.get("corrections", {})
 
-                            all_pay_date_overrides = cast(
-                                dict[str, dict[str, str]],
-                                st.session_state.get("pay_date_overrides", {}),
+                            all_pay_date_overrides: dict[str, dict[str, str]] = st.session_state.get(
+                                "pay_date_overrides", {}
                             )
                             if supports_kwarg(build_household_package, "pay_date_overrides"):
                                 household_kwargs["pay_date_overrides"] = all_pay_date_overrides
-                            elif any(all_pay_date_overrides.values()):
+                            elif all_pay_date_overrides and any(all_pay_date_overrides.values()):
                                 st.warning(
                                     "Manual pay-date overrides require a newer backend version. "
                                     "Overrides were ignored for this run."
@@ -2392,14 +2274,10 @@ def main() -> None:
                             annual_result = {"report": report_payload, "filers_analysis": [analysis_obj]}
 
                             snapshot = fallback_snapshot
+                            snapshot_resolved = True
 
                         annual_filers = cast(list[dict[str, Any]], annual_result.get("filers_analysis", []))
-                        active_analysis = next(
-                            (f for f in annual_filers if f.get("public", {}).get("id") == active_filer_id),
-                            None,
-                        )
-                        if active_analysis is None and annual_filers:
-                            active_analysis = annual_filers[0]
+                        active_analysis = select_filer_analysis(annual_filers, active_filer_id)
                         if active_analysis is not None:
                             active_meta = cast(dict[str, Any], active_analysis.get("internal", {}).get("meta", {}))
                             extracted_payload = active_meta.get("extracted")
@@ -2412,8 +2290,9 @@ def main() -> None:
                                     pay_date=latest_pay_date_for_view,
                                 )
                                 st.session_state["snapshot"] = snapshot
-                        if "snapshot" not in locals():
-                            latest_hash = _hash_file(latest_file)
+                                snapshot_resolved = True
+                        if not snapshot_resolved:
+                            latest_hash = cached_file_hash(latest_file)
                             snapshot = get_cached_paystub_snapshot(str(latest_file), latest_hash, render_scale)
                             snapshot = apply_zero_period_ui_inference(snapshot)
                             st.session_state["snapshot"] = snapshot
@@ -2428,7 +2307,7 @@ def main() -> None:
                         raw_count = 0 if household_mode else preview_paystub_count
 
                     else:
-                        file_hash = _hash_file(Path(selected))
+                        file_hash = cached_file_hash(Path(selected))
                         snapshot = get_cached_paystub_snapshot(str(selected), file_hash, render_scale)
                         snapshot = apply_zero_period_ui_inference(snapshot)
                         st.session_state["snapshot"] = snapshot
@@ -2439,6 +2318,7 @@ def main() -> None:
                 quality = build_extraction_quality(snapshot)
                 duration = round(time.perf_counter() - start_perf, 2)
                 st.session_state["extract_quality"] = quality
+                st.session_state["_quality_snapshot"] = snapshot
                 st.session_state["extract_run_meta"] = {
                     "timestamp": run_timestamp,
                     "duration_s": duration,
@@ -2468,66 +2348,45 @@ def main() -> None:
     snapshot = cast(PaystubSnapshot, snapshot_data)
 
     active_scope = st.session_state.get("analysis_scope", "single")
-    extracted = snapshot_to_dict(snapshot)
-
-    # Helper for safe state summing
-    def safe_sum_state_ytd(state_data: dict[str, Any]) -> Decimal:
-        total = Decimal("0.00")
-        for state_val in state_data.values():
-            val = None
-            # Handle if state_val is AmountPair object or dict
-            if hasattr(state_val, "ytd"):
-                val = state_val.ytd
-            elif isinstance(state_val, dict):
-                val = state_val.get("ytd")
-            else:
-                val = state_val  # Assume scalar or Decimal
-
-            if val is not None:
-                total += Decimal(str(val))
-        return total
+    extracted = cached_snapshot_dict(snapshot)
 
     state_total = safe_sum_state_ytd(snapshot.state_income_tax)
 
-    quality_data = cast(dict[str, Any], st.session_state.get("extract_quality", {}))
-    if not quality_data:
+    # Rescore only when the session snapshot was replaced since the stored quality was computed.
+    quality_data = cast(dict[str, Any], st.session_state.get("extract_quality") or {})
+    if not quality_data or st.session_state.get("_quality_snapshot") is not snapshot:
         quality_data = build_extraction_quality(snapshot)
         st.session_state["extract_quality"] = quality_data
+        st.session_state["_quality_snapshot"] = snapshot
 
-    m1, m2, m3, m4 = st.columns(4)
-    with m1:
-        metric_card("Federal Tax YTD", format_money(snapshot.federal_income_tax.ytd))
-    with m2:
-        metric_card("State Tax YTD (Total)", format_money(state_total))
-    with m3:
-        metric_card("Social Security YTD", format_money(snapshot.social_security_tax.ytd))
-    with m4:
-        metric_card("Medicare YTD", format_money(snapshot.medicare_tax.ytd))
+    render_metric_cards(
+        (
+            ("Federal Tax YTD", cached_format_money(snapshot.federal_income_tax.ytd)),
+            ("State Tax YTD (Total)", cached_format_money(state_total)),
+            ("Social Security YTD", cached_format_money(snapshot.social_security_tax.ytd)),
+            ("Medicare YTD", cached_format_money(snapshot.medicare_tax.ytd)),
+        )
+    )
 
     render_extraction_quality_panel(quality_data)
 
     if snapshot.state_income_tax:
         st.markdown("### State Tax YTD By State")
-        state_items = sorted(snapshot.state_income_tax.items())
-        column_count = min(4, len(state_items))
-        for offset in range(0, len(state_items), column_count):
-            cols = st.columns(column_count)
-            chunk = state_items[offset : offset + column_count]
-            for idx, (state, pair) in enumerate(chunk):
-                with cols[idx]:
-                    metric_card(f"{state} Tax YTD", format_money(pair.ytd))
+        state_cards = state_ytd_cards(tuple((state, pair.ytd) for state, pair in snapshot.state_income_tax.items()))
+        render_metric_cards(state_cards, columns=min(len(state_cards), 4))
 
     if active_scope == "all_year":
-        app_annual_result = cast(dict[str, Any] | None, st.session_state.get("annual_summary_preview"))
+        session = st.session_state
+        app_annual_result = cast(dict[str, Any] | None, session.get("annual_summary_preview"))
         if app_annual_result:
             # v0.3.0 Multi-Filer Rendering
-            active_filer_id = str(st.session_state.get("active_filer_id", "primary"))
+            active_filer_id = str(session.get("active_filer_id", "primary"))
+            all_corrections = cast(dict[str, Any], session.get("corrections") or {})
+            run_id = session.get("_run_id", 0)
             filers_analysis = cast(list[dict[str, Any]], app_annual_result.get("filers_analysis", []))
 
             # Find the analysis for active filer
-            target_analysis = next((f for f in filers_analysis if f["public"]["id"] == active_filer_id), None)
-            if not target_analysis and filers_analysis:
-                target_analysis = filers_analysis[0]
+            target_analysis = select_filer_analysis(filers_analysis, active_filer_id)
 
             if target_analysis:
                 public = target_analysis["public"]
@@ -2536,7 +2395,7 @@ def main() -> None:
                 extracted = meta["extracted"]
                 state_total = safe_sum_state_ytd(extracted["state_income_tax"])  # re-sum from extracted dict
 
-                st.markdown(f"### Whole-Year Summary: {public['id'].title()} ({public['role']})")
+                st.markdown(whole_year_summary_heading(str(public["id"]), str(public["role"])))
 
                 # Corrections UI
                 with st.expander("Values Verification & Corrections", expanded=True):
@@ -2545,7 +2404,7 @@ def main() -> None:
                     st.markdown("---")
                     st.info("Overrides applied below will be reflected in the final filing package.")
 
-                    existing_corrections = st.session_state.get("corrections", {}).get(active_filer_id, {})
+                    existing_corrections = all_corrections.get(active_filer_id, {})
                     editor_rows = []
                     for k, v in existing_corrections.items():
                         editor_rows.append(
@@ -2563,76 +2422,13 @@ def main() -> None:
                             [{"Field": None, "Value": None, "Reason": ""}], columns=["Field", "Value", "Reason"]
                         )
 
-                    allowed_fields = [
-                        "box1",
-                        "box2",
-                        "box3",
-                        "box4",
-                        "box5",
-                        "box6",
-                    ]
-                    states = [
-                        "AL",
-                        "AK",
-                        "AZ",
-                        "AR",
-                        "CA",
-                        "CO",
-                        "CT",
-                        "DE",
-                        "FL",
-                        "GA",
-                        "HI",
-                        "ID",
-                        "IL",
-                        "IN",
-                        "IA",
-                        "KS",
-                        "KY",
-                        "LA",
-                        "ME",
-                        "MD",
-                        "MA",
-                        "MI",
-                        "MN",
-                        "MS",
-                        "MO",
-                        "MT",
-                        "NE",
-                        "NV",
-                        "NH",
-                        "NJ",
-                        "NM",
-                        "NY",
-                        "NC",
-                        "ND",
-                        "OH",
-                        "OK",
-                        "OR",
-                        "PA",
-                        "RI",
-                        "SC",
-                        "SD",
-                        "TN",
-                        "TX",
-                        "UT",
-                        "VT",
-                        "VA",
-                        "WA",
-                        "WV",
-                        "WI",
-                        "WY",
-                    ]
-                    for s in states:
-                        allowed_fields.append(f"state_income_tax_{s}")
-
                     edited_df = st.data_editor(
                         df_corrections,
                         column_config={
                             "Field": st.column_config.SelectboxColumn(
                                 "Override Field",
                                 help="Select the exact W-2 Box (e.g., box1 for Wages, box2 for FIT) or state tax key",
-                                options=allowed_fields,
+                                options=CORRECTION_FIELD_OPTIONS,
                                 required=True,
                             ),
                             "Value": st.column_config.NumberColumn(
@@ -2643,51 +2439,24 @@ def main() -> None:
                         num_rows="dynamic",
                         hide_index=True,
                         use_container_width=True,
-                        key=f"corrections_editor_{active_filer_id}_{st.session_state.get('_run_id', 0)}",
+                        key=f"corrections_editor_{active_filer_id}_{run_id}",
                     )
 
                     if st.button("Apply Corrections", key=f"apply_corrections_{active_filer_id}", type="primary"):
-                        if "corrections" not in st.session_state:
-                            st.session_state["corrections"] = {}
-
-                        new_corrections = {}
-                        for idx, row in edited_df.iterrows():
-                            field = row.get("Field")
-                            val = row.get("Value")
-                            reason = row.get("Reason")
-
-                            if not field or pd.isna(val) or pd.isna(field):
-                                continue
-
-                            try:
-                                val_float = float(val)
-                            except (ValueError, TypeError):
-                                continue
-
-                            if pd.isna(reason) or str(reason).strip() == "":
-                                reason = "Manual UI Override"
-
-                            new_corrections[str(field)] = {"value": val_float, "audit_reason": str(reason).strip()}
+                        new_corrections = corrections_from_editor(edited_df)
 
                         if new_corrections != existing_corrections:
-                            st.session_state["corrections"][active_filer_id] = new_corrections
+                            session.setdefault("corrections", {})[active_filer_id] = new_corrections
                             st.rerun()
 
-                y1, y2, y3, y4 = st.columns(4)
-                with y1:
-                    metric_card("Paystubs (Canonical)", str(meta["paystub_count_canonical"]))
-                with y2:
-                    metric_card(
-                        "Gross Pay YTD",
-                        format_money(Decimal(str(extracted["gross_pay"]["ytd"] or 0))),
+                render_metric_cards(
+                    (
+                        ("Paystubs (Canonical)", str(meta["paystub_count_canonical"])),
+                        ("Gross Pay YTD", format_money_text(str(extracted["gross_pay"]["ytd"] or 0))),
+                        ("Federal Tax YTD", format_money_text(str(extracted["federal_income_tax"]["ytd"] or 0))),
+                        ("State Tax YTD Total", cached_format_money(state_total)),
                     )
-                with y3:
-                    metric_card(
-                        "Federal Tax YTD",
-                        format_money(Decimal(str(extracted["federal_income_tax"]["ytd"] or 0))),
-                    )
-                with y4:
-                    metric_card("State Tax YTD Total", format_money(state_total))
+                )
 
                 st.caption(
                     f"Raw paystub files processed: {meta['paystub_count_raw']} | "
@@ -2720,9 +2489,9 @@ def main() -> None:
                         list[dict[str, Any]],
                         internal.get("raw_ledger", internal["ledger"]),
                     )
-                    ledger_df = build_ledger_display_df(ledger_rows, include_calc_columns=True)
+                    ledger_df = cached_ledger_display_df(ledger_rows, include_calc_columns=True)
                 else:
-                    ledger_df = build_ledger_display_df(cast(list[dict[str, Any]], internal["ledger"]))
+                    ledger_df = cached_ledger_display_df(cast(list[dict[str, Any]], internal["ledger"]))
 
                 correction_trace = public.get("correction_trace", [])
 
@@ -2733,51 +2502,64 @@ def main() -> None:
                         st.caption(
                             "The ledger below represents raw OCR values. The final package has been explicitly overridden for the following fields:"
                         )
-                        trace_data = []
-                        for t in correction_trace:
-                            trace_data.append(
-                                {
-                                    "Field": t.get("corrected_field"),
-                                    "Original Value": float(t.get("original_value") or 0.0),
-                                    "Corrected Value": float(t.get("corrected_value") or 0.0),
-                                    "Reason": t.get("reason"),
-                                    "Timestamp": str(t.get("timestamp"))[:19].replace("T", " "),
-                                }
-                            )
-                        t_df = pd.DataFrame(trace_data)
+                        t_df = pd.DataFrame(
+                            [
+                                (
+                                    t.get("corrected_field"),
+                                    float(t.get("original_value") or 0.0),
+                                    float(t.get("corrected_value") or 0.0),
+                                    t.get("reason"),
+                                    str(t.get("timestamp"))[:19].replace("T", " "),
+                                )
+                                for t in correction_trace
+                            ],
+                            columns=CORRECTION_TRACE_COLUMNS,
+                        )
                         st.dataframe(
                             t_df.style.set_properties(**{"background-color": "#fffbea"}),
                             use_container_width=True,
                             hide_index=True,
                         )
-                    st.dataframe(ledger_df, use_container_width=True, hide_index=True)
+                    st.dataframe(
+                        ledger_df,
+                        column_config=LEDGER_COLUMN_CONFIG,
+                        **MONEY_TABLE_KWARGS,
+                        use_container_width=True,
+                        hide_index=True,
+                    )
 
                 # Markdown Report Preview
                 st.markdown("#### Filing Packet Preview")
                 # We can generate markdown for just this filer or the whole household?
                 # package_to_markdown takes the whole package.
                 # So we can show the full markdown.
-                md = package_to_markdown(app_annual_result["report"])
+                md = cached_report_markdown(app_annual_result["report"])
                 st.download_button("Download Packet (Markdown)", md, file_name="filing_packet.md")
                 with st.expander("View Full Report"):
                     st.markdown(md)
 
     st.markdown("### Extracted State Details")
-    state_rows = build_state_detail_rows(snapshot)
-    state_df = pd.DataFrame(state_rows)
-    st.dataframe(
-        state_df.style.set_properties(
-            subset=[col for col in ["This Period", "YTD"] if col in state_df.columns],
-            **{"text-align": "right", "font-family": "'JetBrains Mono', monospace"},
-        ),
-        use_container_width=True,
-        hide_index=True,
+    # Expander bodies still execute when collapsed, so gate the DataFrame/Styler build on an explicit toggle.
+    show_state_details = st.checkbox(
+        f"Show extracted state details ({len(snapshot.state_income_tax)})",
+        value=False,
+        key="show_state_details",
     )
+    if show_state_details:
+        state_df = pd.DataFrame(build_state_detail_rows(snapshot))
+        st.dataframe(
+            state_df.style.set_properties(
+                subset=[col for col in ["This Period", "YTD"] if col in state_df.columns],
+                **{"text-align": "right", "font-family": "'JetBrains Mono', monospace"},
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
 
-    evidence_rows = collect_evidence_lines(extracted)
+    evidence_rows = list(collect_evidence_lines(extracted))
     with st.expander(f"Evidence lines ({len(evidence_rows)})", expanded=False):
         if evidence_rows:
-            evidence_df = pd.DataFrame([{"Field": key, "Evidence": line} for key, line in evidence_rows])
+            evidence_df = pd.DataFrame(evidence_rows, columns=EVIDENCE_TABLE_COLUMNS)
             st.dataframe(evidence_df, use_container_width=True, hide_index=True)
         else:
             st.info("No evidence lines were captured for this extraction.")
@@ -2790,6 +2572,8 @@ def main() -> None:
     )
     if active_filer_consistency_issues:
         render_auto_heal_panel(active_filer_consistency_issues)
+    # W-2 OCR never renders below W2_MIN_RENDER_SCALE; rounding keeps the cache key on the slider's 0.1 grid.
+    w2_render_scale = max(round(render_scale, 1), W2_MIN_RENDER_SCALE)
     upload_version = int(st.session_state.get("_w2_upload_version", 0))
     uploaded = st.file_uploader(
         "Upload W-2 JSON or PDF (optional)",
@@ -2799,38 +2583,35 @@ def main() -> None:
     w2_data = None
     uploaded_source_tag = None
     if uploaded is not None:
-        uploaded_bytes = uploaded.getvalue()
-        digest = hashlib.sha1(uploaded_bytes).hexdigest()[:12]
-        uploaded_source_tag = f"{uploaded.name}:{len(uploaded_bytes)}:{digest}"
+        # Identity-only source tag, not a security check: 6 blake2b bytes give the 12 hex chars we need.
+        digest = uploaded_file_digest(uploaded, "blake2b", digest_size=6)
+        uploaded_source_tag = f"{uploaded.name}:{uploaded.size}:{digest}"
         file_name = uploaded.name.lower()
         if file_name.endswith(".json"):
             try:
-                w2_data = json.loads(uploaded_bytes.decode("utf-8-sig"))
+                w2_data = loads_json_bytes(uploaded.getvalue())
                 show_notice("Loaded W-2 JSON from upload. W-2 input fields were auto-populated.")
-            except json.JSONDecodeError:
+            except (json.JSONDecodeError, UnicodeDecodeError):
                 st.error("Uploaded file is not valid JSON.")
                 return
         elif file_name.endswith(".pdf"):
-            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_pdf:
-                temp_pdf.write(uploaded_bytes)
-                temp_path = Path(temp_pdf.name)
             try:
-                file_hash = _hash_file(temp_path)
-                w2_data = get_cached_w2_payload(
-                    pdf_path_str=str(temp_path),
-                    file_hash=file_hash,
-                    render_scale=max(render_scale, 3.0),
-                    psm=6,
-                    fallback_year=int(year),
-                )
+                file_hash = uploaded_file_digest(uploaded, "sha256")
+                # getbuffer() exposes the upload without copying; release it before Streamlit reuses the file.
+                with uploaded.getbuffer() as upload_view:
+                    w2_data = get_cached_w2_payload(
+                        upload_view,
+                        file_hash=file_hash,
+                        render_scale=w2_render_scale,
+                        psm=6,
+                        fallback_year=int(year),
+                    )
                 show_notice("Loaded W-2 PDF via OCR. W-2 input fields were auto-populated.")
                 with st.expander("View extracted W-2 OCR payload", expanded=False):
                     st.json(w2_data)
             except Exception as exc:
                 st.error(f"Failed to parse W-2 PDF: {exc}")
                 return
-            finally:
-                temp_path.unlink(missing_ok=True)
 
     # Auto-load W-2 from household setup for the active filer when upload is not provided.
     if uploaded is None and w2_data is None and active_filer_cfg is not None:
@@ -2839,25 +2620,19 @@ def main() -> None:
             str(path) for path in cast(list[Any], filer_sources.get("w2_files", [])) if str(path).strip()
         ]
         if config_w2_files:
+            config_w2_paths = tuple(config_w2_files)
+            config_source_tag = f"config|{active_filer_id}|{int(year)}|{','.join(config_w2_paths)}"
             try:
-                config_source_tag = "|".join(
-                    [
-                        "config",
-                        str(active_filer_id),
-                        str(int(year)),
-                        ",".join(config_w2_files),
-                    ]
-                )
                 w2_data = get_cached_config_w2_payload(
-                    file_paths=tuple(config_w2_files),
+                    file_paths=config_w2_paths,
                     base_dir_str=str(config_base_dir),
                     tax_year=int(year),
-                    render_scale=max(render_scale, 3.0),
+                    render_scale=w2_render_scale,
                 )
                 uploaded_source_tag = config_source_tag
                 if st.session_state.get("_w2_config_loaded_tag") != config_source_tag:
                     show_notice(
-                        f"Loaded W-2 from household setup for `{active_filer_id}`. "
+                        f"Loaded W-2 from household setup for <code>{active_filer_id}</code>. "
                         "W-2 input fields were auto-populated."
                     )
                     st.session_state["_w2_config_loaded_tag"] = config_source_tag
@@ -2892,7 +2667,7 @@ def main() -> None:
         st.session_state.pop("annual_packet", None)
         st.rerun()
 
-    w2_validation_data = st.session_state.get("w2_validation")
+    w2_validation_data = prior_w2_validation
     if w2_validation_data:
         validation_payload = cast(dict[str, Any], w2_validation_data)
         comparison_summary = cast(dict[str, Any], validation_payload.get("comparison_summary", {}))
@@ -2905,13 +2680,11 @@ def main() -> None:
 
         st.markdown("#### Comparison Results")
         st.caption("Columns: Field, Paystub, W-2, Difference, Status, Flag")
-        comparison_df = build_comparison_display_df(comparison_rows)
+        comparison_df = cached_comparison_display_df(comparison_rows)
         st.dataframe(
-            style_flagged_rows(
-                comparison_df,
-                "Flag",
-                right_align_columns=["Paystub", "W-2", "Difference"],
-            ),
+            cached_flagged_styler(comparison_df, "Flag"),
+            column_config=COMPARISON_COLUMN_CONFIG,
+            **MONEY_TABLE_KWARGS,
             use_container_width=True,
             hide_index=True,
         )
@@ -2920,7 +2693,7 @@ def main() -> None:
         with dl_json_col:
             st.download_button(
                 "Download Validation (JSON)",
-                data=json.dumps(validation_payload, indent=2),
+                data=dumps_json_pretty(validation_payload),
                 file_name="w2_validation_ui.json",
                 mime="application/json",
             )
@@ -2934,234 +2707,24 @@ def main() -> None:
         if step2_needs_review:
             critical_hint = ""
             if unresolved_critical_codes:
-                unique_codes = ", ".join(sorted(set(unresolved_critical_codes)))
-                critical_hint = f" Unreviewed critical extraction flags: {unique_codes}."
+                critical_hint = (
+                    f" Unreviewed critical extraction flags: {', '.join(sorted(unresolved_critical_codes))}."
+                )
             st.warning(
                 "Step 3 remains locked until Step 2 is completed (no mismatches/review-needed flags and all critical "
                 f"anomalies reviewed in [Consistency Audit](#consistency-audit)).{critical_hint}"
             )
 
     if step2_marked_completed:
-        st.markdown("---")
-        render_step_heading(
-            3,
-            "Filing Packet",
-            "Generate annual ledger artifacts, run filing checks, and produce exportable validation outputs.",
+        render_filing_packet_step(
+            household_config=household_config,
+            config_base_dir=config_base_dir,
+            year=int(year),
+            render_scale=render_scale,
+            tolerance=tolerance,
+            active_step=active_step,
         )
 
-        include_w2 = st.checkbox(
-            "Include W-2 comparison in annual packet",
-            value=True,
-            help="Disable this to build the packet from paystubs only.",
-        )
-        if include_w2:
-            st.caption("Checkbox ON: annual packet includes W-2 match/mismatch checks and influences Ready To File.")
-        else:
-            st.caption("Checkbox OFF: annual packet is paystub-only (no W-2 comparison), useful for extraction QA.")
-        can_build_packet = st.session_state.get("w2_validation") is not None
-
-        build_button_type: ButtonKind = "primary" if active_step == 3 else "secondary"
-        build_col, info_col = st.columns([0.86, 0.14], gap="small")
-        with build_col:
-            build_packet_clicked = st.button(
-                "Build Filing Packet",
-                type=build_button_type,
-                disabled=not can_build_packet,
-            )
-        with info_col:
-            with st.popover("i", use_container_width=False):
-                st.markdown("**Build Filing Packet details**")
-                st.markdown(
-                    "- Processes all payslips for the selected tax year.\n"
-                    "- Applies YTD verification checks and consistency rules.\n"
-                    "- Generates downloadable JSON, Markdown, and CSV artifacts.\n"
-                    "- Includes W-2 checks when the checkbox is enabled."
-                )
-
-        if build_packet_clicked:
-            # Use st.session_state["household_config"] as the SSOT
-            household_cfg = st.session_state["household_config"]
-
-            def packet_snapshot_loader(source_cfg: dict[str, Any]) -> list[PaystubSnapshot]:
-                p_dir = resolve_household_path(str(source_cfg["paystubs_dir"]), config_base_dir)
-                return collect_annual_snapshots(
-                    paystubs_dir=p_dir,
-                    year=int(year),
-                    render_scale=render_scale,
-                    psm=6,
-                )
-
-            def packet_w2_loader(source_cfg: dict[str, Any]) -> dict[str, Any] | None:
-                # If this is the active filer AND we have a W-2 session state for them, use it
-                f_id = next((f["id"] for f in household_cfg["filers"] if f["sources"] == source_cfg), None)
-                if f_id == st.session_state.get("active_filer_id"):
-                    w2_val = st.session_state.get("w2_validation")
-                    if w2_val:
-                        return cast(dict[str, Any], w2_val.get("w2_input"))
-
-                # Fallback to config-defined w2_files if present
-                w2_files = source_cfg.get("w2_files", [])
-                if w2_files:
-                    from paystub_analyzer.w2_aggregator import load_and_aggregate_w2s
-
-                    return load_and_aggregate_w2s(w2_files, config_base_dir, int(year), render_scale)
-                return None
-
-            corrections_payload = st.session_state.get("corrections", {})
-            packet_pay_date_overrides = cast(
-                dict[str, dict[str, str]],
-                st.session_state.get("pay_date_overrides", {}),
-            )
-
-            packet = build_household_package(
-                household_config=household_cfg,
-                tax_year=int(year),
-                snapshot_loader=packet_snapshot_loader,
-                w2_loader=packet_w2_loader,
-                tolerance=tolerance,
-                corrections=corrections_payload,
-                pay_date_overrides=packet_pay_date_overrides,
-            )
-            st.session_state["annual_packet"] = packet
-            st.rerun()
-
-        packet_data = st.session_state.get("annual_packet")
-        current_packet = None
-        if packet_data:
-            current_packet = cast(dict[str, Any], packet_data)
-
-        if current_packet:
-            # If it's a household report (contains 'report' key from build_household_package)
-            report = current_packet.get("report", current_packet)
-            summary = report.get("household_summary", {})
-            metadata = report.get("metadata", {})
-            filers = report.get("filers", [])
-
-            p1, p2, p3, p4 = st.columns(4)
-            if summary:
-                # Household aggregate metrics
-                p1.metric("Total Gross Pay", format_money(Decimal(summary.get("total_gross_pay_cents", 0)) / 100))
-                p2.metric("Total Fed Tax", format_money(Decimal(summary.get("total_fed_tax_cents", 0)) / 100))
-                p3.metric("Ready To File", str(summary.get("ready_to_file", False)))
-
-                all_issues = []
-                total_canonical = 0
-                for f in filers:
-                    all_issues.extend(f.get("consistency_issues", []))
-                    total_canonical += f.get("paystub_count_canonical", 0)  # Fallback if missing
-                    # Note: count_canonical/raw are often in meta, but we might have flattened some in public
-                    # If not in public, we sum what we have.
-
-                critical_count = sum(1 for issue in all_issues if issue.get("severity") == "critical")
-                p4.metric("Total Critical Issues", critical_count)
-
-                st.caption(
-                    f"Household: {metadata.get('state', 'Unknown')} | "
-                    f"Filing Status: {metadata.get('filing_status', 'Unknown')} | "
-                    f"Year: {metadata.get('filing_year', 'Unknown')}"
-                )
-            else:
-                # Legacy single-filer fallback metrics
-                p1.metric("Paystubs (Canonical)", current_packet.get("paystub_count_canonical", 0))
-                p2.metric("Authenticity Score", current_packet.get("authenticity_assessment", {}).get("score", 0))
-                p3.metric("Ready To File", str(current_packet.get("ready_to_file", False)))
-                critical_count = sum(
-                    1 for issue in current_packet.get("consistency_issues", []) if issue.get("severity") == "critical"
-                )
-                p4.metric("Critical Issues", critical_count)
-                st.caption(f"Raw paystub files analyzed: {current_packet.get('paystub_count_raw', 0)}")
-
-            blockers: list[str] = []
-            if summary:
-                if not summary.get("ready_to_file"):
-                    blockers.append("Household package is not ready to file.")
-            else:
-                if critical_count > 0:
-                    blockers.append(f"{critical_count} critical consistency issue(s) must be resolved.")
-                if not bool(current_packet.get("ready_to_file")):
-                    blockers.append("Packet is currently marked not ready to file.")
-
-            # Unified decision UI
-            st.markdown("#### Filing Decision")
-            if blockers:
-                st.error("Step 3 decision: NOT READY TO FILE")
-                for blocker in blockers:
-                    st.markdown(f"- {blocker}")
-            else:
-                st.success("Step 3 decision: READY TO FILE")
-
-            if summary:
-                st.markdown("#### Multi-Filer Consistency Summary")
-                for f in filers:
-                    fid = f"{f['id']} ({f['role']})"
-                    f_issues = f.get("consistency_issues", [])
-                    if not f_issues:
-                        st.write(f"✅ **{fid}**: No issues detected.")
-                    else:
-                        st.write(f"⚠️ **{fid}**: {len(f_issues)} issue(s)")
-                        for issue in f_issues:
-                            prefix = "[CRITICAL]" if issue.get("severity") == "critical" else "[WARNING]"
-                            st.markdown(f"  - {prefix} `{issue.get('code')}`: {issue.get('message')}")
-            else:
-                st.markdown("#### Consistency Issues")
-                issues = current_packet.get("consistency_issues", [])
-                if not issues:
-                    st.success("No consistency issues detected.")
-                else:
-                    for issue in issues:
-                        prefix = "[CRITICAL]" if issue.get("severity") == "critical" else "[WARNING]"
-                        st.markdown(f"- {prefix} `{issue.get('code')}`: {issue.get('message')}")
-
-            st.markdown("#### Filing Checklist")
-            for item in current_packet["filing_checklist"]:
-                st.markdown(f"- **{item['item']}**: {item['detail']}")
-
-            st.markdown("#### Annual Ledger")
-            packet_ledger_df = build_ledger_display_df(cast(list[dict[str, Any]], current_packet["ledger"]))
-            st.dataframe(
-                style_flagged_rows(
-                    packet_ledger_df,
-                    "YTD Verification",
-                    right_align_columns=[
-                        "Gross YTD",
-                        "Federal YTD",
-                        "SS YTD",
-                        "Medicare YTD",
-                        "State YTD Total",
-                    ],
-                ),
-                use_container_width=True,
-                hide_index=True,
-            )
-            packet_ytd_flagged = packet_ledger_df[packet_ledger_df["YTD Verification"] != "—"]
-            if not packet_ytd_flagged.empty:
-                st.warning(
-                    "YTD verification flags were found in this filing packet. Check the rows below before filing."
-                )
-                st.dataframe(packet_ytd_flagged, use_container_width=True, hide_index=True)
-
-            packet_json = json.dumps(current_packet, indent=2)
-            packet_md = package_to_markdown(current_packet)
-            packet_csv = ledger_to_csv(current_packet["ledger"])
-            st.download_button(
-                "Download Filing Packet (JSON)",
-                data=packet_json,
-                file_name=f"tax_filing_package_{int(year)}.json",
-                mime="application/json",
-            )
-            st.download_button(
-                "Download Filing Packet (Markdown)",
-                data=packet_md,
-                file_name=f"tax_filing_package_{int(year)}.md",
-                mime="text/markdown",
-            )
-            st.download_button(
-                "Download Annual Ledger (CSV)",
-                data=packet_csv,
-                file_name=f"paystub_ledger_{int(year)}.csv",
-                mime="text/csv",
-            )
-
 
 if __name__ == "__main__":
     main()
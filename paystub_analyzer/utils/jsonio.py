@@ -0,0 +1,38 @@
+import codecs
+import json
+from typing import Any
+
+# orjson is an optional speedup (the "fast" extra); fall back to stdlib json.
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def loads_json_bytes(data: bytes) -> Any:
+    """Parse UTF-8 JSON bytes, tolerating a leading byte-order mark."""
+    data = data.removeprefix(codecs.BOM_UTF8)
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_state_map(value: Any) -> str:
+    """Serialize a by-state map for a ledger CSV cell; stdlib json keeps the established {"CA": 1.0} spacing."""
+    return json.dumps(value, sort_keys=True)
+
+
+def dumps_json_canonical(value: Any) -> bytes:
+    """Serialize as compact, key-sorted UTF-8 JSON bytes, suitable for fingerprinting."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, sort_keys=True, separators=(",", ":")).encode()
+
+
+def dumps_json_pretty(value: Any) -> bytes:
+    """Serialize a download payload as two-space indented UTF-8 JSON bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, indent=2).encode()
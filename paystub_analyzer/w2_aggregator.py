@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import json
 from decimal import Decimal
 from pathlib import Path
 from typing import Any, NamedTuple
 
+from paystub_analyzer.utils.jsonio import loads_json_bytes
 from paystub_analyzer.w2_pdf import w2_pdf_to_json_payload
 
 
@@ -55,8 +55,7 @@ def load_and_aggregate_w2s(
 
         # Load Data
         if full_path.suffix.lower() == ".json":
-            with full_path.open("r") as f:
-                data = json.load(f)
+            data = loads_json_bytes(full_path.read_bytes())
         else:
             data = w2_pdf_to_json_payload(full_path, render_scale=pdf_render_scale, fallback_year=year)
 
@@ -10,7 +10,7 @@ from typing import Any
 
 import pypdfium2 as pdfium
 
-from paystub_analyzer.core import extract_money_values, normalize_line, run_tesseract
+from paystub_analyzer.core import PDFIUM_LOCK, extract_money_values, normalize_line, run_tesseract
 
 US_STATE_CODES = {
     "AL",
@@ -68,13 +68,18 @@ US_STATE_CODES = {
 
 
 def ocr_pdf_text(pdf_path: Path, render_scale: float = 3.0, psm: int = 6) -> str:
-    document = pdfium.PdfDocument(str(pdf_path))
+    with PDFIUM_LOCK:
+        document = pdfium.PdfDocument(str(pdf_path))
+        try:
+            images = [page.render(scale=render_scale).to_pil() for page in document]
+        finally:
+            document.close()
     pages_text: list[str] = []
-    for page in document:
+    for image in images:
         with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as temp_file:
             image_path = Path(temp_file.name)
         try:
-            page.render(scale=render_scale).to_pil().save(image_path)
+            image.save(image_path)
             pages_text.append(run_tesseract(image_path, psm=psm))
         finally:
             image_path.unlink(missing_ok=True)
@@ -1,9 +1,11 @@
 import unittest
 from decimal import Decimal
+from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
-from paystub_analyzer.annual import build_tax_filing_package, run_consistency_checks
+from paystub_analyzer.annual import build_tax_filing_package, collect_annual_snapshots, run_consistency_checks
 from paystub_analyzer.core import AmountPair, PaystubSnapshot
 
 
@@ -372,6 +374,27 @@ class AnnualTests(unittest.TestCase):
         ]
         self.assertEqual(len(fed_mismatch_issues), 1)
 
+    def test_collect_annual_snapshots_parallel_matches_serial(self) -> None:
+        dates = ["2025-02-15", "2025-01-15", "2025-01-31"]
+        files = [Path(f"Pay Date {pay_date}.pdf") for pay_date in dates]
+
+        def fake_extract(path: Path, render_scale: float, psm: int) -> PaystubSnapshot:
+            return snapshot(path.stem.removeprefix("Pay Date "), gross=("100.00", "100.00"), fed=("10.00", "10.00"))
+
+        with (
+            patch("paystub_analyzer.annual.list_paystub_files", return_value=files),
+            patch("paystub_analyzer.annual.extract_paystub_snapshot", side_effect=fake_extract),
+        ):
+            serial = collect_annual_snapshots(Path("."), 2025, max_workers=1)
+            parallel = collect_annual_snapshots(Path("."), 2025, max_workers=3)
+
+        self.assertEqual(parallel, serial)
+        self.assertEqual([s.pay_date for s in parallel], sorted(dates))
+
+    def test_collect_annual_snapshots_rejects_non_positive_workers(self) -> None:
+        with self.assertRaises(ValueError):
+            collect_annual_snapshots(Path("."), 2025, max_workers=0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,173 @@
+import csv
+import io
+import json
+from decimal import Decimal
+
+import pandas as pd
+
+from paystub_analyzer.cli.annual import write_ledger_csv
+from paystub_analyzer.core import AmountPair, PaystubSnapshot
+from paystub_analyzer.ui import app
+from paystub_analyzer.ui.app import (
+    LEDGER_CSV_FIELDNAMES,
+    anomaly_review_label,
+    corrections_from_editor,
+    dumps_json_pretty,
+    file_name_series,
+    first_existing_path,
+    ledger_to_csv,
+)
+
+
+def _ledger_row(pay_date: str, gross: float) -> dict[str, object]:
+    return {
+        "pay_date": pay_date,
+        "file": f"{pay_date}.pdf",
+        "gross_pay_this_period": gross,
+        "gross_pay_ytd": gross,
+        "federal_tax_this_period": 100.0,
+        "federal_tax_ytd": 100.0,
+        "social_security_tax_this_period": 62.0,
+        "social_security_tax_ytd": 62.0,
+        "medicare_tax_this_period": 14.5,
+        "medicare_tax_ytd": 14.5,
+        "state_tax_this_period_total": 40.0,
+        "state_tax_ytd_total": 40.0,
+        "state_tax_this_period_by_state": {"VA": 30.0, "MD": 10.0},
+        "state_tax_ytd_by_state": {"VA": 30.0, "MD": 10.0},
+        "ytd_verification": None,
+    }
+
+
+def test_ledger_to_csv_writes_each_row_once():
+    ledger = [_ledger_row("2025-01-15", 1000.0), _ledger_row("2025-01-31", 1000.0)]
+
+    rows = list(csv.reader(io.StringIO(ledger_to_csv(ledger).decode())))
+
+    assert rows[0] == list(LEDGER_CSV_FIELDNAMES)
+    assert len(rows) == 3
+    assert [row[0] for row in rows[1:]] == ["2025-01-15", "2025-01-31"]
+    by_state = rows[1][LEDGER_CSV_FIELDNAMES.index("state_tax_this_period_by_state")]
+    assert by_state == '{"MD": 10.0, "VA": 30.0}'
+    assert rows[1][-1] == ""
+
+
+def test_cli_ledger_csv_matches_ui_download(tmp_path):
+    ledger = [_ledger_row("2025-01-15", 1000.0), _ledger_row("2025-01-31", 1000.0)]
+    target = tmp_path / "ledger.csv"
+
+    write_ledger_csv(target, ledger)
+
+    assert target.read_bytes() == ledger_to_csv(ledger)
+
+
+def test_ledger_to_csv_empty_ledger():
+    assert ledger_to_csv([]) == b""
+
+
+def test_corrections_from_editor_skips_incomplete_rows():
+    edited = pd.DataFrame(
+        [
+            {"Field": "box1", "Value": 1234.5, "Reason": "  W-2 reissued  "},
+            {"Field": "box2", "Value": None, "Reason": "missing value"},
+            {"Field": None, "Value": 10.0, "Reason": "missing field"},
+            {"Field": "", "Value": 10.0, "Reason": "blank field"},
+            {"Field": "state_income_tax_VA", "Value": "250", "Reason": None},
+            {"Field": "box3", "Value": "n/a", "Reason": "not numeric"},
+            {"Field": "box4", "Value": 5.0, "Reason": "   "},
+        ],
+        columns=["Field", "Value", "Reason"],
+    )
+
+    assert corrections_from_editor(edited) == {
+        "box1": {"value": 1234.5, "audit_reason": "W-2 reissued"},
+        "state_income_tax_VA": {"value": 250.0, "audit_reason": "Manual UI Override"},
+        "box4": {"value": 5.0, "audit_reason": "Manual UI Override"},
+    }
+
+
+def test_file_name_series_strips_directories():
+    values = pd.Series(["stubs/2025/a.pdf", "C:\\stubs\\b.pdf", None, "", "ALL (2 files)", "stubs/"], dtype=object)
+
+    assert file_name_series(values).tolist() == ["a.pdf", "b.pdf", "—", "—", "ALL (2 files)", "stubs/"]
+
+
+def test_anomaly_review_label_identifies_the_card():
+    assert anomaly_review_label(2, "ytd_decrease", "Gross YTD dropped") == (
+        "Mark #2 as reviewed (ytd_decrease): Gross YTD dropped"
+    )
+    long_label = anomaly_review_label(3, "ytd_decrease", "x" * 100)
+    assert long_label.endswith("…")
+    assert len(long_label.split(": ", 1)[1]) == 60
+
+
+def test_first_existing_path_matches_case_insensitively():
+    candidates = ["w2_forms/W2_2025_Redacted.pdf", "w2_forms/W2_2025.pdf", "w2_forms/w2_2025.json"]
+
+    assert first_existing_path(candidates, {"W2_2025.pdf", "w2_2025.json"}) == "w2_forms/W2_2025.pdf"
+    assert first_existing_path(candidates, {"w2_2025.PDF"}) == "w2_forms/w2_2025.PDF"
+    assert first_existing_path(candidates, {"other.pdf"}) == "w2_forms/W2_2025_Redacted.pdf"
+
+
+def test_dumps_json_pretty_matches_stdlib_indent():
+    payload = {"tax_year": 2025, "comparisons": [{"field": "box1", "status": "match"}], "ready": True}
+
+    assert json.loads(dumps_json_pretty(payload)) == payload
+    assert dumps_json_pretty(payload) == json.dumps(payload, indent=2).encode()
+
+
+def test_disk_cached_snapshot_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "SNAPSHOT_DISK_CACHE_DIR", tmp_path)
+    snapshot = PaystubSnapshot(
+        file="2025-01-15.pdf",
+        pay_date="2025-01-15",
+        gross_pay=AmountPair(Decimal("1000.00"), Decimal("1000.00"), "Gross Pay 1,000.00"),
+        federal_income_tax=AmountPair(None, None, None),
+        social_security_tax=AmountPair(None, None, None),
+        medicare_tax=AmountPair(None, None, None),
+        k401_contrib=AmountPair(None, None, None),
+        state_income_tax={"VA": AmountPair(Decimal("30.00"), Decimal("30.00"), "VA 30.00")},
+        normalized_lines=["Gross Pay 1,000.00"],
+    )
+
+    assert app.load_disk_cached_snapshot("abc", 3.0) is None
+    app.store_disk_cached_snapshot("abc", 3.0, snapshot)
+
+    assert app.load_disk_cached_snapshot("abc", 3.0) == snapshot
+    assert app.load_disk_cached_snapshot("abc", 2.5) is None
+
+    app.snapshot_disk_cache_path("abc", 3.0).write_text('{"file": "x.pdf"}', encoding="utf-8")
+    assert app.load_disk_cached_snapshot("abc", 3.0) is None
+
+
+def test_disk_cached_snapshot_misses_after_extractor_version_bump(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "SNAPSHOT_DISK_CACHE_DIR", tmp_path)
+    snapshot = PaystubSnapshot(
+        file="2025-01-15.pdf",
+        pay_date="2025-01-15",
+        gross_pay=AmountPair(Decimal("1000.00"), Decimal("1000.00"), "Gross Pay 1,000.00"),
+        federal_income_tax=AmountPair(None, None, None),
+        social_security_tax=AmountPair(None, None, None),
+        medicare_tax=AmountPair(None, None, None),
+        k401_contrib=AmountPair(None, None, None),
+        state_income_tax={},
+        normalized_lines=[],
+    )
+    app.store_disk_cached_snapshot("abc", 3.0, snapshot)
+    assert app.load_disk_cached_snapshot("abc", 3.0) == snapshot
+
+    monkeypatch.setattr(app, "SNAPSHOT_EXTRACTOR_VERSION", app.SNAPSHOT_EXTRACTOR_VERSION + 1)
+    assert app.load_disk_cached_snapshot("abc", 3.0) is None
+
+    monkeypatch.undo()
+    monkeypatch.setattr(app, "SNAPSHOT_DISK_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(app, "PACKAGE_VERSION", "99.0.0")
+    assert app.load_disk_cached_snapshot("abc", 3.0) is None
+
+
+def test_snapshot_disk_cache_is_opt_in(monkeypatch):
+    monkeypatch.delenv(app.SNAPSHOT_DISK_CACHE_ENV, raising=False)
+    assert not app.snapshot_disk_cache_enabled()
+
+    monkeypatch.setenv(app.SNAPSHOT_DISK_CACHE_ENV, "1")
+    assert app.snapshot_disk_cache_enabled()